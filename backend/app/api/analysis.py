@@ -1,16 +1,25 @@
 """
 Router de API para endpoints de análisis de mercado.
 """
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+from typing import Annotated, Any, Optional
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from redis.asyncio import Redis
 
 from app.application.analysis_service import AnalysisService
 from app.domain.schemas import (
     MarketStatsResponse,
     VendorStatsResponse,
-    BrandStatsResponse
+    BrandStatsResponse,
+    MarketOverviewResponse,
+    CategoryInsightsResponse,
+    MessageResponse,
+    get_adapter
 )
-from app.core.dependencies import SPARQLClientDep
+from app.core.config import get_settings
+from app.core.dependencies import RedisDep, SingleFlightDep
+from app.core.errors import wrap_errors
 
 # ============================================================================
 # CONFIGURACIÓN DEL ROUTER
@@ -21,29 +30,119 @@ router = APIRouter(
     tags=["analysis"]
 )
 
+# Adaptadores construidos una sola vez: validan listas completas en el
+# núcleo compilado de Pydantic en lugar de un constructor Python por fila
+_STATS_ADAPTER = get_adapter(list[MarketStatsResponse])
+_VENDOR_ADAPTER = get_adapter(list[VendorStatsResponse])
+_BRAND_ADAPTER = get_adapter(list[BrandStatsResponse])
+_OVERVIEW_ADAPTER = get_adapter(MarketOverviewResponse)
+_INSIGHTS_ADAPTER = get_adapter(CategoryInsightsResponse)
+
 
 # ============================================================================
 # DEPENDENCIAS
 # ============================================================================
 
-async def get_analysis_service(
-    sparql_client: SPARQLClientDep
-) -> AnalysisService:
+async def get_analysis_service(request: Request) -> AnalysisService:
     """
-    Inyecta el servicio de análisis.
+    Inyecta el servicio de análisis compartido del proceso.
 
     Args:
-        sparql_client: Cliente SPARQL
+        request: Request actual (acceso a app.state)
 
     Returns:
         AnalysisService: Servicio de análisis
     """
-    return AnalysisService(sparql_client)
+    return request.app.state.analysis_service
 
 
 AnalysisServiceDep = Annotated[AnalysisService, Depends(get_analysis_service)]
 
 
+# ============================================================================
+# CACHÉ DE RESPUESTAS
+# ============================================================================
+
+async def _cache_get(redis: Optional[Redis], key: str) -> Optional[Any]:
+    """
+    Lee una respuesta cacheada desde Redis.
+
+    Args:
+        redis: Cliente Redis (None si el caché está deshabilitado)
+        key: Clave de caché
+
+    Returns:
+        Any: Contenido deserializado o None si no hay caché
+    """
+    if redis is None:
+        return None
+
+    try:
+        cached = await redis.get(key)
+    except Exception:
+        # Fallos de caché no deben afectar la respuesta
+        return None
+
+    if cached is None:
+        return None
+
+    return orjson.loads(cached)
+
+
+async def _cache_set(redis: Optional[Redis], key: str, content: Any) -> None:
+    """
+    Guarda una respuesta en Redis con TTL configurado.
+
+    Args:
+        redis: Cliente Redis (None si el caché está deshabilitado)
+        key: Clave de caché
+        content: Contenido serializable a guardar
+    """
+    if redis is None:
+        return
+
+    try:
+        payload = orjson.dumps(content, default=str)
+        await redis.set(key, payload, ex=get_settings().CACHE_TTL)
+    except Exception:
+        # Fallos de caché no deben afectar la respuesta
+        pass
+
+
+# ============================================================================
+# CACHÉ HTTP (ETag / Cache-Control)
+# ============================================================================
+
+# Las estadísticas cambian como mucho cada pocos minutos: el cliente o CDN
+# puede revalidar con ETag y servir copias frescas sin tocar SPARQL
+_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+
+def _etag_response(request: Request, payload: Any) -> Response:
+    """
+    Construye la respuesta JSON con ETag y honra If-None-Match.
+
+    Args:
+        request: Request actual (lectura del header If-None-Match)
+        payload: Contenido serializable de la respuesta
+
+    Returns:
+        Response: 304 si el ETag coincide, o la respuesta con headers de caché
+    """
+    body = orjson.dumps(payload, default=str)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=headers
+    )
+
+
 # ============================================================================
 # ENDPOINTS
 # ============================================================================
@@ -54,8 +153,12 @@ AnalysisServiceDep = Annotated[AnalysisService, Depends(get_analysis_service)]
     summary="Rangos de precio por categoría",
     description="Obtiene estadísticas de precios agrupadas por categoría"
 )
+@wrap_errors("Error al obtener rangos de precio")
 async def get_price_ranges(
-    service: AnalysisServiceDep
+    request: Request,
+    service: AnalysisServiceDep,
+    redis: RedisDep,
+    sf: SingleFlightDep
 ):
     """
     Obtiene rangos de precio por categoría.
@@ -69,26 +172,30 @@ async def get_price_ranges(
 
     Útil para análisis de mercado y posicionamiento de precios.
     """
-    try:
-        stats_list = await service.get_price_range_by_category()
-
-        return [
-            MarketStatsResponse(
-                categoria=stat.categoria,
-                precio_minimo=stat.precio_minimo,
-                precio_maximo=stat.precio_maximo,
-                precio_promedio=stat.precio_promedio,
-                total_productos=stat.total_productos,
-                rango_precio=stat.rango_precio
-            )
-            for stat in stats_list
-        ]
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener rangos de precio: {str(e)}"
-        )
+    # Intentar leer desde caché
+    cache_key = "analysis:price-ranges"
+    cached = await _cache_get(redis, cache_key)
+    if cached is not None:
+        return _etag_response(request, cached)
+
+    # Coalescer llamadas concurrentes idénticas en una sola consulta
+    stats_list = await sf.do(
+        "analysis:price-ranges",
+        service.get_price_range_by_category
+    )
+
+    response = _STATS_ADAPTER.validate_python(
+        stats_list,
+        from_attributes=True
+    )
+    payload = _STATS_ADAPTER.dump_python(response, mode="json")
+
+    # Guardar en caché para próximas consultas
+    await _cache_set(redis, cache_key, payload)
+
+    # Respuesta directa: los datos ya están validados, así se evita la
+    # segunda pasada de validación/serialización del response_model
+    return _etag_response(request, payload)
 
 
 @router.get(
@@ -97,8 +204,12 @@ async def get_price_ranges(
     summary="Estadísticas de vendedores",
     description="Obtiene estadísticas de productos y precios por vendedor"
 )
+@wrap_errors("Error al obtener estadísticas de vendedores")
 async def get_vendor_stats(
-    service: AnalysisServiceDep
+    request: Request,
+    service: AnalysisServiceDep,
+    redis: RedisDep,
+    sf: SingleFlightDep
 ):
     """
     Obtiene estadísticas por vendedor.
@@ -112,26 +223,30 @@ async def get_vendor_stats(
 
     Útil para analizar la oferta de cada vendedor.
     """
-    try:
-        stats_list = await service.get_vendor_statistics()
-
-        return [
-            VendorStatsResponse(
-                vendedor=stat.vendedor,
-                total_productos=stat.total_productos,
-                precio_promedio=stat.precio_promedio,
-                precio_minimo=stat.precio_minimo,
-                precio_maximo=stat.precio_maximo,
-                precio_competitivo=stat.precio_competitivo
-            )
-            for stat in stats_list
-        ]
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener estadísticas de vendedores: {str(e)}"
-        )
+    # Intentar leer desde caché
+    cache_key = "analysis:vendors"
+    cached = await _cache_get(redis, cache_key)
+    if cached is not None:
+        return _etag_response(request, cached)
+
+    # Coalescer llamadas concurrentes idénticas en una sola consulta
+    stats_list = await sf.do(
+        "analysis:vendors",
+        service.get_vendor_statistics
+    )
+
+    response = _VENDOR_ADAPTER.validate_python(
+        stats_list,
+        from_attributes=True
+    )
+    payload = _VENDOR_ADAPTER.dump_python(response, mode="json")
+
+    # Guardar en caché para próximas consultas
+    await _cache_set(redis, cache_key, payload)
+
+    # Respuesta directa: los datos ya están validados, así se evita la
+    # segunda pasada de validación/serialización del response_model
+    return _etag_response(request, payload)
 
 
 @router.get(
@@ -140,8 +255,12 @@ async def get_vendor_stats(
     summary="Comparación de marcas",
     description="Obtiene estadísticas de productos y precios por marca"
 )
+@wrap_errors("Error al obtener comparación de marcas")
 async def get_brand_stats(
-    service: AnalysisServiceDep
+    request: Request,
+    service: AnalysisServiceDep,
+    redis: RedisDep,
+    sf: SingleFlightDep
 ):
     """
     Obtiene comparación de marcas.
@@ -152,33 +271,41 @@ async def get_brand_stats(
 
     Útil para análisis de posicionamiento de marca en el mercado.
     """
-    try:
-        brands_list = await service.get_brand_comparison()
-
-        return [
-            BrandStatsResponse(
-                marca=brand["marca"],
-                total_productos=brand["total_productos"],
-                precio_promedio=brand["precio_promedio"]
-            )
-            for brand in brands_list
-        ]
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener comparación de marcas: {str(e)}"
-        )
+    # Intentar leer desde caché
+    cache_key = "analysis:brands"
+    cached = await _cache_get(redis, cache_key)
+    if cached is not None:
+        return _etag_response(request, cached)
+
+    # Coalescer llamadas concurrentes idénticas en una sola consulta
+    brands_list = await sf.do(
+        "analysis:brands",
+        service.get_brand_comparison
+    )
+
+    response = _BRAND_ADAPTER.validate_python(brands_list)
+    payload = _BRAND_ADAPTER.dump_python(response, mode="json")
+
+    # Guardar en caché para próximas consultas
+    await _cache_set(redis, cache_key, payload)
+
+    # Respuesta directa: los datos ya están validados, así se evita la
+    # segunda pasada de validación/serialización del response_model
+    return _etag_response(request, payload)
 
 
 @router.get(
     "/overview",
-    response_model=dict,
+    response_model=MarketOverviewResponse,
     summary="Resumen del mercado",
     description="Obtiene un resumen general con estadísticas clave del mercado"
 )
+@wrap_errors("Error al obtener resumen del mercado")
 async def get_market_overview(
-    service: AnalysisServiceDep
+    request: Request,
+    service: AnalysisServiceDep,
+    redis: RedisDep,
+    sf: SingleFlightDep
 ):
     """
     Obtiene un resumen general del mercado.
@@ -191,26 +318,40 @@ async def get_market_overview(
 
     Útil para dashboards y vistas generales del marketplace.
     """
-    try:
-        overview = await service.get_market_overview()
-        return overview
+    # Intentar leer desde caché
+    cache_key = "analysis:overview"
+    cached = await _cache_get(redis, cache_key)
+    if cached is not None:
+        return _etag_response(request, cached)
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener resumen del mercado: {str(e)}"
-        )
+    # Coalescer llamadas concurrentes idénticas en una sola consulta
+    overview = await sf.do(
+        "analysis:overview",
+        service.get_market_overview
+    )
+
+    response = _OVERVIEW_ADAPTER.validate_python(overview)
+    payload = _OVERVIEW_ADAPTER.dump_python(response, mode="json")
+
+    # Guardar en caché para próximas consultas
+    await _cache_set(redis, cache_key, payload)
+
+    return _etag_response(request, payload)
 
 
 @router.get(
     "/categories/{categoria}/insights",
-    response_model=dict,
+    response_model=CategoryInsightsResponse,
     summary="Insights de categoría",
     description="Obtiene insights detallados de una categoría específica"
 )
+@wrap_errors("Error al obtener insights de categoría")
 async def get_category_insights(
+    request: Request,
     categoria: str,
-    service: AnalysisServiceDep
+    service: AnalysisServiceDep,
+    redis: RedisDep,
+    sf: SingleFlightDep
 ):
     """
     Obtiene insights detallados de una categoría.
@@ -223,21 +364,65 @@ async def get_category_insights(
 
     - **categoria**: Nombre de la categoría (ej: "Laptop", "Smartphone")
     """
-    try:
-        insights = await service.get_category_insights(categoria)
+    # Intentar leer desde caché (clave incluye la categoría)
+    cache_key = f"analysis:categories:{categoria}:insights"
+    cached = await _cache_get(redis, cache_key)
+    if cached is not None:
+        return _etag_response(request, cached)
+
+    # Coalescer llamadas concurrentes idénticas en una sola consulta
+    insights = await sf.do(
+        f"analysis:categories:{categoria}:insights",
+        lambda: service.get_category_insights(categoria)
+    )
+
+    if not insights.get("encontrada"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Categoría no encontrada: {categoria}"
+        )
 
-        if not insights.get("encontrada"):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Categoría no encontrada: {categoria}"
-            )
+    response = _INSIGHTS_ADAPTER.validate_python(insights)
+    payload = _INSIGHTS_ADAPTER.dump_python(response, mode="json")
 
-        return insights
+    # Guardar en caché para próximas consultas
+    await _cache_set(redis, cache_key, payload)
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener insights de categoría: {str(e)}"
+    return _etag_response(request, payload)
+
+
+@router.delete(
+    "/cache",
+    response_model=MessageResponse,
+    summary="Invalidar caché de análisis",
+    description="Elimina las respuestas cacheadas de los endpoints de análisis"
+)
+@wrap_errors("Error al invalidar caché")
+async def invalidate_analysis_cache(
+    service: AnalysisServiceDep,
+    redis: RedisDep
+):
+    """
+    Invalida el caché de los endpoints de análisis.
+
+    Debe llamarse cuando se modifican los datos de productos
+    para que las estadísticas reflejen los cambios.
+    """
+    # Invalidar también el caché TTL en memoria del servicio
+    await service.invalidate_cache()
+
+    if redis is None:
+        return MessageResponse(
+            message="Caché deshabilitado",
+            detail="No hay entradas que invalidar"
         )
+
+    deleted = 0
+    async for key in redis.scan_iter("analysis:*"):
+        await redis.delete(key)
+        deleted += 1
+
+    return MessageResponse(
+        message="Caché de análisis invalidado",
+        detail=f"Entradas eliminadas: {deleted}"
+    )
@@ -2,17 +2,17 @@
 Router de API para endpoints de comparación de productos.
 """
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Query, Request
 
 from app.application.comparison_service import ComparisonService
-from app.application.product_service import ProductService
 from app.domain.schemas import (
+    CompareBySpecsRequest,
     ProductComparisonRequest,
     ProductComparisonResponse,
-    ProductResponse
+    ProductResponse,
+    get_adapter
 )
-from app.core.dependencies import SPARQLClientDep, ReasonerEngineDep
-from app.core.exceptions import ProductNotFoundException
+from app.core.errors import wrap_errors
 
 # ============================================================================
 # CONFIGURACIÓN DEL ROUTER
@@ -23,27 +23,25 @@ router = APIRouter(
     tags=["comparisons"]
 )
 
+# Adaptador compartido: valida la lista completa en el núcleo compilado
+_PRODUCT_LIST = get_adapter(list[ProductResponse])
+
 
 # ============================================================================
 # DEPENDENCIAS
 # ============================================================================
 
-async def get_comparison_service(
-    sparql_client: SPARQLClientDep,
-    reasoner: ReasonerEngineDep
-) -> ComparisonService:
+async def get_comparison_service(request: Request) -> ComparisonService:
     """
-    Inyecta el servicio de comparación.
+    Inyecta el servicio de comparación compartido del proceso.
 
     Args:
-        sparql_client: Cliente SPARQL
-        reasoner: Motor de razonamiento
+        request: Request actual (acceso a app.state)
 
     Returns:
         ComparisonService: Servicio de comparación
     """
-    product_service = ProductService(sparql_client, reasoner)
-    return ComparisonService(sparql_client, product_service)
+    return request.app.state.comparison_service
 
 
 ComparisonServiceDep = Annotated[ComparisonService, Depends(get_comparison_service)]
@@ -59,6 +57,7 @@ ComparisonServiceDep = Annotated[ComparisonService, Depends(get_comparison_servi
     summary="Comparar productos",
     description="Compara múltiples productos mostrando diferencias y mejor precio"
 )
+@wrap_errors("Error al comparar productos")
 async def compare_products(
     request: ProductComparisonRequest,
     service: ComparisonServiceDep
@@ -80,30 +79,18 @@ async def compare_products(
     }
     ```
     """
-    try:
-        comparison = await service.compare_products(request.product_ids)
-
-        return ProductComparisonResponse(
-            productos=[
-                ProductResponse.model_validate(p.__dict__)
-                for p in comparison.productos
-            ],
-            diferencias=comparison.obtener_diferencias(),
-            mejor_precio=ProductResponse.model_validate(
-                comparison.obtener_mejor_precio().__dict__
-            )
-        )
-
-    except ProductNotFoundException as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+    comparison = await service.compare_products(request.product_ids)
+
+    return ProductComparisonResponse.model_construct(
+        productos=_PRODUCT_LIST.validate_python(
+            comparison.productos,
+            from_attributes=True
+        ),
+        diferencias=comparison.obtener_diferencias(),
+        mejor_precio=ProductResponse.model_validate(
+            comparison.obtener_mejor_precio()
         )
+    )
 
 
 @router.get(
@@ -112,6 +99,7 @@ async def compare_products(
     summary="Mejor relación calidad-precio",
     description="Encuentra productos con mejor relación calidad-precio en una categoría"
 )
+@wrap_errors("Error al buscar mejor valor")
 async def find_best_value(
     category: str,
     service: ComparisonServiceDep,
@@ -130,15 +118,8 @@ async def find_best_value(
     - **category**: Categoría de productos (ej: "Laptop", "Smartphone")
     - **limit**: Cantidad máxima de productos a retornar
     """
-    try:
-        products = await service.find_best_value_in_category(category, limit)
-        return products
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al buscar mejor valor: {str(e)}"
-        )
+    products = await service.find_best_value_in_category(category, limit)
+    return products
 
 
 @router.post(
@@ -147,9 +128,9 @@ async def find_best_value(
     summary="Comparar por especificaciones",
     description="Compara productos por especificaciones específicas"
 )
+@wrap_errors("Error al comparar especificaciones")
 async def compare_by_specifications(
-    product_ids: list[str],
-    specifications: list[str],
+    request: CompareBySpecsRequest,
     service: ComparisonServiceDep
 ):
     """
@@ -179,27 +160,13 @@ async def compare_by_specifications(
     }
     ```
     """
-    try:
-        if len(product_ids) < 2:
-            raise ValueError("Se requieren al menos 2 productos para comparar")
+    # Deduplicar preservando el orden de llegada
+    product_ids = list(dict.fromkeys(request.product_ids))
+    specifications = list(dict.fromkeys(request.specifications))
 
-        if not specifications:
-            raise ValueError("Se requiere al menos 1 especificación para comparar")
+    comparison = await service.compare_by_specifications(
+        product_ids,
+        specifications
+    )
 
-        comparison = await service.compare_by_specifications(
-            product_ids,
-            specifications
-        )
-
-        return comparison
-
-    except ProductNotFoundException as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    return comparison
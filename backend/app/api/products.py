@@ -1,8 +1,11 @@
 """
 Router de API para endpoints de productos.
 """
+import asyncio
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import orjson
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 
 from app.application.product_service import ProductService
 from app.domain.schemas import (
@@ -10,15 +13,13 @@ from app.domain.schemas import (
     ProductListResponse,
     ProductSearchParams,
     SimilarProductsResponse,
+    RelatedProductsResponse,
     CompatibleProductsResponse,
-    IncompatibleProductsResponse
+    IncompatibleProductsResponse,
+    get_adapter
 )
-from app.core.dependencies import (
-    SPARQLClientDep,
-    ReasonerEngineDep,
-    PaginationDep
-)
-from app.core.exceptions import ProductNotFoundException
+from app.core.dependencies import PaginationDep
+from app.core.errors import wrap_errors
 
 # ============================================================================
 # CONFIGURACIÓN DEL ROUTER
@@ -29,26 +30,26 @@ router = APIRouter(
     tags=["products"]
 )
 
+# Adaptador construido una sola vez: valida la lista completa en el
+# núcleo compilado de Pydantic en lugar de un constructor por producto
+_PRODUCT_LIST = get_adapter(list[ProductResponse])
+
 
 # ============================================================================
 # DEPENDENCIAS
 # ============================================================================
 
-async def get_product_service(
-    sparql_client: SPARQLClientDep,
-    reasoner: ReasonerEngineDep
-) -> ProductService:
+async def get_product_service(request: Request) -> ProductService:
     """
-    Inyecta el servicio de productos.
+    Inyecta el servicio de productos compartido del proceso.
 
     Args:
-        sparql_client: Cliente SPARQL
-        reasoner: Motor de razonamiento
+        request: Request actual (acceso a app.state)
 
     Returns:
         ProductService: Servicio de productos
     """
-    return ProductService(sparql_client, reasoner)
+    return request.app.state.product_service
 
 
 ProductServiceDep = Annotated[ProductService, Depends(get_product_service)]
@@ -64,6 +65,7 @@ ProductServiceDep = Annotated[ProductService, Depends(get_product_service)]
     summary="Listar productos",
     description="Obtiene una lista paginada de todos los productos disponibles"
 )
+@wrap_errors("Error al obtener productos")
 async def list_products(
     service: ProductServiceDep,
     pagination: PaginationDep
@@ -76,18 +78,16 @@ async def list_products(
 
     Returns una lista de productos con información de paginación.
     """
-    products = await service.get_all_products(
+    # Página y COUNT real en paralelo
+    products, total_items = await service.get_products_page(
         limit=pagination.limit,
         offset=pagination.offset
     )
 
-    # Calcular total de páginas (por ahora estimado)
-    # En producción, se haría una consulta COUNT separada
-    total_items = len(products)
     total_pages = (total_items + pagination.page_size - 1) // pagination.page_size
 
-    return ProductListResponse(
-        items=[ProductResponse.model_validate(p.__dict__) for p in products],
+    return ProductListResponse.model_construct(
+        items=_PRODUCT_LIST.validate_python(products, from_attributes=True),
         total=total_items,
         page=pagination.page,
         page_size=pagination.page_size,
@@ -95,12 +95,40 @@ async def list_products(
     )
 
 
+@router.get(
+    "/stream",
+    summary="Listar productos (streaming)",
+    description="Transmite todos los productos como NDJSON, uno por línea"
+)
+@wrap_errors("Error al transmitir productos")
+async def stream_products(
+    service: ProductServiceDep,
+    page_size: Annotated[int, Query(description="Tamaño de página interno", ge=1, le=500)] = 100
+):
+    """
+    Transmite todos los productos como NDJSON.
+
+    Cada línea de la respuesta es un producto serializado en JSON.
+    Los bytes salen al socket a medida que llegan las páginas desde
+    SPARQL, sin materializar la lista completa en memoria.
+
+    - **page_size**: Cantidad de productos por consulta SPARQL interna
+    """
+    async def _gen():
+        async for p in service.iter_all_products(page_size=page_size):
+            item = ProductResponse.model_validate(p)
+            yield orjson.dumps(item.model_dump(), default=str) + b"\n"
+
+    return StreamingResponse(_gen(), media_type="application/x-ndjson")
+
+
 @router.get(
     "/{product_id}",
     response_model=ProductResponse,
     summary="Obtener producto",
     description="Obtiene los detalles completos de un producto específico"
 )
+@wrap_errors("Error al obtener producto")
 async def get_product(
     product_id: str,
     service: ProductServiceDep
@@ -113,15 +141,8 @@ async def get_product(
     Raises:
         404: Si el producto no existe
     """
-    try:
-        product = await service.get_product_by_id(product_id)
-        return ProductResponse.model_validate(product.__dict__)
-
-    except ProductNotFoundException as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+    product = await service.get_product_by_id(product_id)
+    return ProductResponse.model_validate(product)
 
 
 @router.get(
@@ -130,6 +151,7 @@ async def get_product(
     summary="Buscar productos",
     description="Busca productos aplicando filtros semánticos"
 )
+@wrap_errors("Error al buscar productos")
 async def search_products(
     service: ProductServiceDep,
     pagination: PaginationDep,
@@ -160,19 +182,17 @@ async def search_products(
         keyword=keyword
     )
 
-    # Ejecutar búsqueda
-    products = await service.search_products(
+    # Ejecutar búsqueda: página y COUNT real en paralelo
+    products, total_items = await service.search_products_page(
         search_params,
         limit=pagination.limit,
         offset=pagination.offset
     )
 
-    # Calcular total de páginas
-    total_items = len(products)
     total_pages = (total_items + pagination.page_size - 1) // pagination.page_size
 
-    return ProductListResponse(
-        items=[ProductResponse.model_validate(p.__dict__) for p in products],
+    return ProductListResponse.model_construct(
+        items=_PRODUCT_LIST.validate_python(products, from_attributes=True),
         total=total_items,
         page=pagination.page,
         page_size=pagination.page_size,
@@ -186,6 +206,7 @@ async def search_products(
     summary="Productos similares",
     description="Obtiene productos similares usando relaciones semánticas"
 )
+@wrap_errors("Error al obtener productos similares")
 async def get_similar_products(
     product_id: str,
     service: ProductServiceDep,
@@ -201,25 +222,59 @@ async def get_similar_products(
     - **product_id**: ID del producto de referencia
     - **limit**: Cantidad máxima de productos similares a retornar
     """
-    try:
-        # Obtener producto origen
-        origin = await service.get_product_by_id(product_id)
-
-        # Obtener similares
-        similar = await service.get_similar_products(product_id, limit)
-
-        return SimilarProductsResponse(
-            producto_origen=ProductResponse.model_validate(origin.__dict__),
-            productos_similares=[
-                ProductResponse.model_validate(p.__dict__) for p in similar
-            ]
+    # Obtener producto origen y similares en paralelo (consultas independientes)
+    origin, similar = await asyncio.gather(
+        service.get_product_by_id(product_id),
+        service.get_similar_products(product_id, limit)
+    )
+
+    return SimilarProductsResponse.model_construct(
+        producto_origen=ProductResponse.model_validate(origin),
+        productos_similares=_PRODUCT_LIST.validate_python(
+            similar,
+            from_attributes=True
         )
+    )
+
+
+@router.get(
+    "/{product_id}/related",
+    response_model=RelatedProductsResponse,
+    summary="Productos relacionados",
+    description="Obtiene productos similares y compatibles en una sola consulta"
+)
+@wrap_errors("Error al obtener productos relacionados")
+async def get_related_products(
+    product_id: str,
+    service: ProductServiceDep,
+    limit: Annotated[int, Query(description="Límite total de resultados", ge=1, le=40)] = 10
+):
+    """
+    Obtiene productos similares y compatibles de una sola vez.
+
+    Fusiona las consultas de /similar y /compatible en un único SELECT
+    con UNION, ahorrando un viaje al triplestore cuando la página de
+    detalle necesita ambas relaciones.
+
+    - **product_id**: ID del producto de referencia
+    - **limit**: Cantidad máxima total de productos relacionados
+    """
+    origin, (similar, compatible) = await asyncio.gather(
+        service.get_product_by_id(product_id),
+        service.get_related_products(product_id, limit)
+    )
 
-    except ProductNotFoundException as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
+    return RelatedProductsResponse.model_construct(
+        producto_origen=ProductResponse.model_validate(origin),
+        productos_similares=_PRODUCT_LIST.validate_python(
+            similar,
+            from_attributes=True
+        ),
+        productos_compatibles=_PRODUCT_LIST.validate_python(
+            compatible,
+            from_attributes=True
         )
+    )
 
 
 @router.get(
@@ -228,6 +283,7 @@ async def get_similar_products(
     summary="Productos compatibles",
     description="Obtiene productos compatibles con uno dado"
 )
+@wrap_errors("Error al obtener productos compatibles")
 async def get_compatible_products(
     product_id: str,
     service: ProductServiceDep
@@ -239,25 +295,19 @@ async def get_compatible_products(
 
     - **product_id**: ID del producto de referencia
     """
-    try:
-        # Obtener producto origen
-        origin = await service.get_product_by_id(product_id)
-
-        # Obtener compatibles
-        compatible = await service.get_compatible_products(product_id)
-
-        return CompatibleProductsResponse(
-            producto_origen=ProductResponse.model_validate(origin.__dict__),
-            productos_compatibles=[
-                ProductResponse.model_validate(p.__dict__) for p in compatible
-            ]
-        )
+    # Obtener producto origen y compatibles en paralelo (consultas independientes)
+    origin, compatible = await asyncio.gather(
+        service.get_product_by_id(product_id),
+        service.get_compatible_products(product_id)
+    )
 
-    except ProductNotFoundException as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
+    return CompatibleProductsResponse.model_construct(
+        producto_origen=ProductResponse.model_validate(origin),
+        productos_compatibles=_PRODUCT_LIST.validate_python(
+            compatible,
+            from_attributes=True
         )
+    )
 
 
 @router.get(
@@ -266,6 +316,7 @@ async def get_compatible_products(
     summary="Productos incompatibles",
     description="Obtiene productos incompatibles con razones"
 )
+@wrap_errors("Error al obtener productos incompatibles")
 async def get_incompatible_products(
     product_id: str,
     service: ProductServiceDep
@@ -278,20 +329,13 @@ async def get_incompatible_products(
 
     - **product_id**: ID del producto de referencia
     """
-    try:
-        # Obtener producto origen
-        origin = await service.get_product_by_id(product_id)
-
-        # Obtener incompatibles
-        incompatible = await service.get_incompatible_products(product_id)
-
-        return IncompatibleProductsResponse(
-            producto_origen=ProductResponse.model_validate(origin.__dict__),
-            productos_incompatibles=incompatible
-        )
+    # Obtener producto origen e incompatibles en paralelo (consultas independientes)
+    origin, incompatible = await asyncio.gather(
+        service.get_product_by_id(product_id),
+        service.get_incompatible_products(product_id)
+    )
 
-    except ProductNotFoundException as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
+    return IncompatibleProductsResponse.model_construct(
+        producto_origen=ProductResponse.model_validate(origin),
+        productos_incompatibles=incompatible
+    )
@@ -3,15 +3,16 @@ Router de API para endpoints de recomendaciones.
 """
 from typing import Annotated
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Query, Request
 
 from app.application.recommendation_service import RecommendationService
 from app.domain.schemas import (
     RecommendationListResponse,
     RecommendationResponse,
-    ProductResponse
+    ProductResponse,
+    get_adapter
 )
-from app.core.dependencies import SPARQLClientDep, ReasonerEngineDep
+from app.core.errors import wrap_errors
 
 # ============================================================================
 # CONFIGURACIÓN DEL ROUTER
@@ -22,26 +23,27 @@ router = APIRouter(
     tags=["recommendations"]
 )
 
+# Adaptadores construidos una sola vez: validan listas completas en el
+# núcleo compilado de Pydantic en lugar de un constructor por elemento
+_RECOMMENDATION_LIST = get_adapter(list[RecommendationResponse])
+_PRODUCT_LIST = get_adapter(list[ProductResponse])
+
 
 # ============================================================================
 # DEPENDENCIAS
 # ============================================================================
 
-async def get_recommendation_service(
-    sparql_client: SPARQLClientDep,
-    reasoner: ReasonerEngineDep
-) -> RecommendationService:
+async def get_recommendation_service(request: Request) -> RecommendationService:
     """
-    Inyecta el servicio de recomendaciones.
+    Inyecta el servicio de recomendaciones compartido del proceso.
 
     Args:
-        sparql_client: Cliente SPARQL
-        reasoner: Motor de razonamiento
+        request: Request actual (acceso a app.state)
 
     Returns:
         RecommendationService: Servicio de recomendaciones
     """
-    return RecommendationService(sparql_client, reasoner)
+    return request.app.state.recommendation_service
 
 
 RecommendationServiceDep = Annotated[
@@ -60,6 +62,7 @@ RecommendationServiceDep = Annotated[
     summary="Recomendaciones para usuario",
     description="Obtiene recomendaciones personalizadas usando reglas SWRL y razonamiento semántico"
 )
+@wrap_errors("Error al obtener recomendaciones")
 async def get_user_recommendations(
     user_id: str,
     service: RecommendationServiceDep,
@@ -78,26 +81,15 @@ async def get_user_recommendations(
     - **user_id**: ID del usuario
     - **limit**: Cantidad máxima de recomendaciones
     """
-    try:
-        recommendations = await service.get_recommendations_for_user(user_id, limit)
-
-        return RecommendationListResponse(
-            items=[
-                RecommendationResponse(
-                    producto=ProductResponse.model_validate(rec.producto.__dict__),
-                    razon=rec.razon,
-                    score=rec.score
-                )
-                for rec in recommendations
-            ],
-            usuario_id=user_id
-        )
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener recomendaciones: {str(e)}"
-        )
+    recommendations = await service.get_recommendations_for_user(user_id, limit)
+
+    return RecommendationListResponse.model_construct(
+        items=_RECOMMENDATION_LIST.validate_python(
+            recommendations,
+            from_attributes=True
+        ),
+        usuario_id=user_id
+    )
 
 
 @router.get(
@@ -106,6 +98,7 @@ async def get_user_recommendations(
     summary="Productos en presupuesto",
     description="Obtiene productos dentro del presupuesto del usuario"
 )
+@wrap_errors("Error al obtener productos en presupuesto")
 async def get_budget_products(
     user_id: str,
     service: RecommendationServiceDep
@@ -118,19 +111,9 @@ async def get_budget_products(
 
     - **user_id**: ID del usuario
     """
-    try:
-        products = await service.get_budget_products(user_id)
-
-        return [
-            ProductResponse.model_validate(p.__dict__)
-            for p in products
-        ]
+    products = await service.get_budget_products(user_id)
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener productos en presupuesto: {str(e)}"
-        )
+    return _PRODUCT_LIST.validate_python(products, from_attributes=True)
 
 
 @router.get(
@@ -139,11 +122,15 @@ async def get_budget_products(
     summary="Recomendaciones personalizadas con filtros",
     description="Recomendaciones con filtros adicionales de categoría y precio"
 )
+@wrap_errors("Error al obtener recomendaciones personalizadas")
 async def get_personalized_recommendations(
     user_id: str,
     service: RecommendationServiceDep,
     categoria: Annotated[str | None, Query(description="Filtrar por categoría")] = None,
-    max_precio: Annotated[float | None, Query(description="Precio máximo", ge=0)] = None,
+    max_precio: Annotated[
+        Decimal | None,
+        Query(description="Precio máximo", ge=0, decimal_places=2)
+    ] = None,
     limit: Annotated[int, Query(description="Límite de recomendaciones", ge=1, le=50)] = 10
 ):
     """
@@ -157,31 +144,17 @@ async def get_personalized_recommendations(
     - **max_precio**: Precio máximo (opcional)
     - **limit**: Cantidad máxima de recomendaciones
     """
-    try:
-        # Convertir max_precio a Decimal si existe
-        max_price_decimal = Decimal(str(max_precio)) if max_precio else None
-
-        recommendations = await service.get_personalized_recommendations(
-            user_id=user_id,
-            category=categoria,
-            max_price=max_price_decimal,
-            limit=limit
-        )
-
-        return RecommendationListResponse(
-            items=[
-                RecommendationResponse(
-                    producto=ProductResponse.model_validate(rec.producto.__dict__),
-                    razon=rec.razon,
-                    score=rec.score
-                )
-                for rec in recommendations
-            ],
-            usuario_id=user_id
-        )
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al obtener recomendaciones personalizadas: {str(e)}"
-        )
+    recommendations = await service.get_personalized_recommendations(
+        user_id=user_id,
+        category=categoria,
+        max_price=max_precio,
+        limit=limit
+    )
+
+    return RecommendationListResponse.model_construct(
+        items=_RECOMMENDATION_LIST.validate_python(
+            recommendations,
+            from_attributes=True
+        ),
+        usuario_id=user_id
+    )
@@ -2,12 +2,52 @@
 Servicio de aplicación para análisis de mercado.
 Implementa casos de uso relacionados con estadísticas y análisis.
 """
-from decimal import Decimal
+from typing import Optional
+
+import numpy as np
 
 from app.infrastructure.sparql.client import SPARQLClient
 from app.infrastructure.sparql.queries import MarketAnalysisQueries
 from app.domain.entities import MarketStats, VendorStats
-from app.core.exceptions import SPARQLQueryError
+from app.core.exceptions import SPARQLException, SPARQLQueryError
+from app.core.ttl_cache import AsyncTTLCache
+from app.core.uri_utils import last_segment
+
+# TTL del caché de estadísticas: los agregados cambian poco y un minuto
+# de desfase es aceptable para análisis de mercado
+STATS_CACHE_TTL = 60
+
+
+def _safe_float(value: str) -> float:
+    """Convierte a float, retornando NaN para valores inválidos."""
+    try:
+        return float(value)
+    except ValueError:
+        return float("nan")
+
+
+def _float_column(bindings: list[dict], key: str) -> np.ndarray:
+    """
+    Extrae una columna numérica de los bindings como arreglo float64.
+
+    La conversión masiva corre en C; solo si algún valor es inválido se
+    repite la pasada marcando esos valores como NaN (para filtrarlos).
+
+    Args:
+        bindings: Bindings de la consulta SPARQL
+        key: Nombre de la variable a extraer
+
+    Returns:
+        np.ndarray: Columna convertida (NaN donde el valor es inválido)
+    """
+    values = [binding.get(key, {}).get("value", "0") for binding in bindings]
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except ValueError:
+        return np.asarray(
+            [_safe_float(value) for value in values],
+            dtype=np.float64
+        )
 
 
 class AnalysisService:
@@ -25,10 +65,23 @@ class AnalysisService:
         """
         self.sparql_client = sparql_client
         self.queries = MarketAnalysisQueries()
+        self._cache = AsyncTTLCache(maxsize=32, ttl=STATS_CACHE_TTL)
 
     async def get_price_range_by_category(self) -> list[MarketStats]:
         """
-        Obtiene estadísticas de precios por categoría.
+        Obtiene estadísticas de precios por categoría (con caché TTL).
+
+        Returns:
+            list[MarketStats]: Lista de estadísticas por categoría
+        """
+        return await self._cache.get_or_set(
+            "price-ranges",
+            self._fetch_price_range_by_category
+        )
+
+    async def _fetch_price_range_by_category(self) -> list[MarketStats]:
+        """
+        Consulta y parsea las estadísticas de precios por categoría.
 
         Returns:
             list[MarketStats]: Lista de estadísticas por categoría
@@ -38,50 +91,82 @@ class AnalysisService:
             query = self.queries.get_price_range_by_category()
             result = await self.sparql_client.query(query)
 
-            # Parsear resultados
-            stats_list = []
-            bindings = result.get("results", {}).get("bindings", [])
-
-            for binding in bindings:
-                try:
-                    # Extraer categoría del URI
-                    categoria_uri = binding.get("categoria", {}).get("value", "")
-                    categoria = self._extract_name_from_uri(categoria_uri)
-
-                    # Crear estadísticas
-                    stats = MarketStats(
-                        categoria=categoria,
-                        precio_minimo=Decimal(
-                            binding.get("precioMinimo", {}).get("value", "0")
-                        ),
-                        precio_maximo=Decimal(
-                            binding.get("precioMaximo", {}).get("value", "0")
-                        ),
-                        precio_promedio=Decimal(
-                            binding.get("precioPromedio", {}).get("value", "0")
-                        ),
-                        total_productos=int(
-                            binding.get("totalProductos", {}).get("value", "0")
-                        )
-                    )
-
-                    stats_list.append(stats)
-
-                except (ValueError, KeyError):
-                    # Saltar categorías con datos inválidos
-                    continue
-
-            return stats_list
-
-        except Exception as e:
+            return self._parse_category_stats(
+                result.get("results", {}).get("bindings", [])
+            )
+
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener estadísticas por categoría: {str(e)}",
                 {}
             )
 
+    @staticmethod
+    def _parse_category_stats(bindings: list[dict]) -> list[MarketStats]:
+        """
+        Parsea bindings de estadísticas por categoría.
+
+        Parseo por columnas (struct-of-arrays): cada columna numérica se
+        convierte en una sola pasada vectorizada en lugar de cuatro
+        float() por fila.
+
+        Args:
+            bindings: Bindings de la consulta SPARQL
+
+        Returns:
+            list[MarketStats]: Lista de estadísticas por categoría
+        """
+        if not bindings:
+            return []
+
+        categorias = [
+            last_segment(binding.get("categoria", {}).get("value", ""))
+            for binding in bindings
+        ]
+        minimos = _float_column(bindings, "precioMinimo")
+        maximos = _float_column(bindings, "precioMaximo")
+        promedios = _float_column(bindings, "precioPromedio")
+        totales = _float_column(bindings, "totalProductos")
+
+        # Saltar filas con datos inválidos (NaN en alguna columna)
+        validas = ~np.isnan(minimos + maximos + promedios + totales)
+
+        return [
+            MarketStats._fast_new(
+                categoria=categoria,
+                precio_minimo=minimo,
+                precio_maximo=maximo,
+                precio_promedio=promedio,
+                total_productos=int(total)
+            )
+            for categoria, minimo, maximo, promedio, total, valida in zip(
+                categorias,
+                minimos.tolist(),
+                maximos.tolist(),
+                promedios.tolist(),
+                totales.tolist(),
+                validas.tolist()
+            )
+            if valida
+        ]
+
     async def get_vendor_statistics(self) -> list[VendorStats]:
         """
-        Obtiene estadísticas por vendedor.
+        Obtiene estadísticas por vendedor (con caché TTL).
+
+        Returns:
+            list[VendorStats]: Lista de estadísticas por vendedor
+        """
+        return await self._cache.get_or_set(
+            "vendors",
+            self._fetch_vendor_statistics
+        )
+
+    async def _fetch_vendor_statistics(self) -> list[VendorStats]:
+        """
+        Consulta y parsea las estadísticas por vendedor.
 
         Returns:
             list[VendorStats]: Lista de estadísticas por vendedor
@@ -91,46 +176,79 @@ class AnalysisService:
             query = self.queries.get_vendor_statistics()
             result = await self.sparql_client.query(query)
 
-            # Parsear resultados
-            stats_list = []
-            bindings = result.get("results", {}).get("bindings", [])
-
-            for binding in bindings:
-                try:
-                    # Crear estadísticas
-                    stats = VendorStats(
-                        vendedor=binding.get("vendedor", {}).get("value", ""),
-                        total_productos=int(
-                            binding.get("totalProductos", {}).get("value", "0")
-                        ),
-                        precio_promedio=Decimal(
-                            binding.get("precioPromedio", {}).get("value", "0")
-                        ),
-                        precio_minimo=Decimal(
-                            binding.get("precioMinimo", {}).get("value", "0")
-                        ),
-                        precio_maximo=Decimal(
-                            binding.get("precioMaximo", {}).get("value", "0")
-                        )
-                    )
-
-                    stats_list.append(stats)
-
-                except (ValueError, KeyError):
-                    # Saltar vendedores con datos inválidos
-                    continue
-
-            return stats_list
-
-        except Exception as e:
+            return self._parse_vendor_stats(
+                result.get("results", {}).get("bindings", [])
+            )
+
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener estadísticas de vendedores: {str(e)}",
                 {}
             )
 
+    @staticmethod
+    def _parse_vendor_stats(bindings: list[dict]) -> list[VendorStats]:
+        """
+        Parsea bindings de estadísticas por vendedor.
+
+        Parseo por columnas, igual que las estadísticas de categoría.
+
+        Args:
+            bindings: Bindings de la consulta SPARQL
+
+        Returns:
+            list[VendorStats]: Lista de estadísticas por vendedor
+        """
+        if not bindings:
+            return []
+
+        vendedores = [
+            binding.get("vendedor", {}).get("value", "")
+            for binding in bindings
+        ]
+        totales = _float_column(bindings, "totalProductos")
+        promedios = _float_column(bindings, "precioPromedio")
+        minimos = _float_column(bindings, "precioMinimo")
+        maximos = _float_column(bindings, "precioMaximo")
+
+        validas = ~np.isnan(totales + promedios + minimos + maximos)
+
+        return [
+            VendorStats._fast_new(
+                vendedor=vendedor,
+                total_productos=int(total),
+                precio_promedio=promedio,
+                precio_minimo=minimo,
+                precio_maximo=maximo
+            )
+            for vendedor, total, promedio, minimo, maximo, valida in zip(
+                vendedores,
+                totales.tolist(),
+                promedios.tolist(),
+                minimos.tolist(),
+                maximos.tolist(),
+                validas.tolist()
+            )
+            if valida
+        ]
+
     async def get_brand_comparison(self) -> list[dict]:
         """
-        Obtiene comparación de marcas.
+        Obtiene comparación de marcas (con caché TTL).
+
+        Returns:
+            list[dict]: Lista de estadísticas por marca
+        """
+        return await self._cache.get_or_set(
+            "brands",
+            self._fetch_brand_comparison
+        )
+
+    async def _fetch_brand_comparison(self) -> list[dict]:
+        """
+        Consulta y parsea la comparación de marcas.
 
         Returns:
             list[dict]: Lista de estadísticas por marca
@@ -140,34 +258,85 @@ class AnalysisService:
             query = self.queries.get_brand_comparison()
             result = await self.sparql_client.query(query)
 
-            # Parsear resultados
-            brands_list = []
-            bindings = result.get("results", {}).get("bindings", [])
-
-            for binding in bindings:
-                try:
-                    brands_list.append({
-                        "marca": binding.get("marca", {}).get("value", ""),
-                        "total_productos": int(
-                            binding.get("totalProductos", {}).get("value", "0")
-                        ),
-                        "precio_promedio": Decimal(
-                            binding.get("precioPromedio", {}).get("value", "0")
-                        )
-                    })
-
-                except (ValueError, KeyError):
-                    # Saltar marcas con datos inválidos
-                    continue
-
-            return brands_list
-
-        except Exception as e:
+            return self._parse_brand_stats(
+                result.get("results", {}).get("bindings", [])
+            )
+
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener comparación de marcas: {str(e)}",
                 {}
             )
 
+    @staticmethod
+    def _parse_brand_stats(bindings: list[dict]) -> list[dict]:
+        """
+        Parsea bindings de comparación de marcas.
+
+        Parseo por columnas, igual que las demás estadísticas.
+
+        Args:
+            bindings: Bindings de la consulta SPARQL
+
+        Returns:
+            list[dict]: Lista de estadísticas por marca
+        """
+        if not bindings:
+            return []
+
+        marcas = [
+            binding.get("marca", {}).get("value", "")
+            for binding in bindings
+        ]
+        totales = _float_column(bindings, "totalProductos")
+        promedios = _float_column(bindings, "precioPromedio")
+
+        validas = ~np.isnan(totales + promedios)
+
+        return [
+            {
+                "marca": marca,
+                "total_productos": int(total),
+                "precio_promedio": promedio
+            }
+            for marca, total, promedio, valida in zip(
+                marcas,
+                totales.tolist(),
+                promedios.tolist(),
+                validas.tolist()
+            )
+            if valida
+        ]
+
+    async def _fetch_combined_stats(
+        self
+    ) -> tuple[list[MarketStats], list[VendorStats], list[dict]]:
+        """
+        Consulta las tres agrupaciones de estadísticas de una sola vez.
+
+        Una única consulta UNION trae las filas de categoría, vendedor
+        y marca etiquetadas con ?dimension; aquí se separan y parsean
+        con los mismos parsers de las consultas individuales.
+
+        Returns:
+            tuple: Estadísticas por categoría, vendedor y marca
+        """
+        query = self.queries.get_combined_market_stats()
+        result = await self.sparql_client.query(query)
+
+        by_dimension: dict[str, list[dict]] = {}
+        for binding in result.get("results", {}).get("bindings", []):
+            dimension = binding.get("dimension", {}).get("value", "")
+            by_dimension.setdefault(dimension, []).append(binding)
+
+        return (
+            self._parse_category_stats(by_dimension.get("categoria", [])),
+            self._parse_vendor_stats(by_dimension.get("vendedor", [])),
+            self._parse_brand_stats(by_dimension.get("marca", []))
+        )
+
     async def get_market_overview(self) -> dict:
         """
         Obtiene un resumen general del mercado.
@@ -176,37 +345,47 @@ class AnalysisService:
             dict: Resumen con múltiples estadísticas
         """
         try:
-            # Obtener todas las estadísticas en paralelo
-            price_stats = await self.get_price_range_by_category()
-            vendor_stats = await self.get_vendor_statistics()
-            brand_stats = await self.get_brand_comparison()
+            # Las tres agrupaciones llegan en una sola consulta UNION
+            # (un RTT y un parse en lugar de tres), cacheada con el
+            # mismo TTL que las estadísticas individuales
+            price_stats, vendor_stats, brand_stats = await self._cache.get_or_set(
+                "overview:combined",
+                self._fetch_combined_stats
+            )
 
             # Calcular totales
             total_categorias = len(price_stats)
             total_vendedores = len(vendor_stats)
             total_marcas = len(brand_stats)
 
-            # Calcular promedio global de precios
-            all_averages = [stat.precio_promedio for stat in price_stats]
-            precio_promedio_global = (
-                sum(all_averages) / len(all_averages)
-                if all_averages
-                else Decimal("0")
+            # Reducciones vectorizadas: un bucle C en lugar de iterar
+            # objetos Python elemento a elemento
+            avgs = np.fromiter(
+                (stat.precio_promedio for stat in price_stats),
+                dtype=np.float64,
+                count=total_categorias
             )
+            precio_promedio_global = float(avgs.mean()) if avgs.size else 0.0
 
             # Encontrar categoría con más productos
-            categoria_top = max(
-                price_stats,
-                key=lambda x: x.total_productos,
-                default=None
-            )
+            categoria_top = None
+            if price_stats:
+                totales = np.fromiter(
+                    (stat.total_productos for stat in price_stats),
+                    dtype=np.int64,
+                    count=total_categorias
+                )
+                categoria_top = price_stats[int(totales.argmax())]
 
             # Encontrar vendedor con más productos
-            vendedor_top = max(
-                vendor_stats,
-                key=lambda x: x.total_productos,
-                default=None
-            )
+            vendedor_top = None
+            if vendor_stats:
+                totales = np.fromiter(
+                    (stat.total_productos for stat in vendor_stats),
+                    dtype=np.int64,
+                    count=total_vendedores
+                )
+                vendedor_top = vendor_stats[int(totales.argmax())]
 
             return {
                 "total_categorias": total_categorias,
@@ -223,7 +402,9 @@ class AnalysisService:
                 } if vendedor_top else None
             }
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener resumen del mercado: {str(e)}",
                 {}
@@ -240,28 +421,36 @@ class AnalysisService:
             dict: Insights de la categoría
         """
         try:
-            # Obtener estadísticas de todas las categorías
-            all_stats = await self.get_price_range_by_category()
-
-            # Filtrar por categoría específica
-            category_stat = next(
-                (stat for stat in all_stats if stat.categoria == categoria),
-                None
+            # Índice por categoría con percentiles precalculados,
+            # memoizado con el mismo TTL que las estadísticas base
+            by_name, percentiles, sorted_avgs = await self._cache.get_or_set(
+                "price-ranges:index",
+                self._build_price_index
             )
 
-            if not category_stat:
-                return {
-                    "categoria": categoria,
-                    "encontrada": False
-                }
-
-            # Calcular percentil de precio
-            all_averages = [stat.precio_promedio for stat in all_stats]
-            sorted_averages = sorted(all_averages)
-            percentil = (
-                sorted_averages.index(category_stat.precio_promedio) /
-                len(sorted_averages) * 100
-            )
+            category_stat = by_name.get(categoria)
+
+            if category_stat is not None:
+                percentil = percentiles[categoria]
+            else:
+                # Categoría fuera del índice (p. ej. recién creada):
+                # consulta dirigida a esa sola categoría, con el índice
+                # cacheado como denominador del percentil
+                category_stat = await self._fetch_single_category(categoria)
+
+                if category_stat is None:
+                    return {
+                        "categoria": categoria,
+                        "encontrada": False
+                    }
+
+                percentil = float(
+                    np.searchsorted(
+                        sorted_avgs,
+                        category_stat.precio_promedio,
+                        side="left"
+                    ) / max(sorted_avgs.size, 1) * 100
+                )
 
             return {
                 "categoria": categoria,
@@ -275,24 +464,93 @@ class AnalysisService:
                 "precio_competitivo": percentil < 50  # Bajo 50% es competitivo
             }
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener insights de categoría: {str(e)}",
                 {"categoria": categoria}
             )
 
-    def _extract_name_from_uri(self, uri: str) -> str:
+    async def _fetch_single_category(
+        self,
+        categoria: str
+    ) -> Optional[MarketStats]:
         """
-        Extrae el nombre de un URI.
+        Consulta las estadísticas de una sola categoría.
 
         Args:
-            uri: URI completo
+            categoria: Nombre de la categoría
 
         Returns:
-            str: Nombre extraído
+            MarketStats: Estadísticas, o None si no tiene productos
+        """
+        query = self.queries.get_price_range_for_category(categoria)
+        result = await self.sparql_client.query(query)
+
+        bindings = result.get("results", {}).get("bindings", [])
+        if not bindings:
+            return None
+
+        binding = bindings[0]
+        total = int(binding.get("totalProductos", {}).get("value", "0"))
+        if total == 0:
+            return None
+
+        return MarketStats(
+            categoria=categoria,
+            precio_minimo=float(
+                binding.get("precioMinimo", {}).get("value", "0")
+            ),
+            precio_maximo=float(
+                binding.get("precioMaximo", {}).get("value", "0")
+            ),
+            precio_promedio=float(
+                binding.get("precioPromedio", {}).get("value", "0")
+            ),
+            total_productos=total
+        )
+
+    async def _build_price_index(self) -> tuple[dict, dict, np.ndarray]:
+        """
+        Construye las estructuras derivadas de las estadísticas de precios.
+
+        Los percentiles se calculan una sola vez para todas las
+        categorías (searchsorted vectorizado); cada insight posterior es
+        una búsqueda de dict O(1). Los promedios ordenados se conservan
+        para ubicar categorías que no están en el índice.
+
+        Returns:
+            tuple: Índices categoría → MarketStats, categoría → percentil
+                y promedios ordenados
+        """
+        all_stats = await self.get_price_range_by_category()
+
+        by_name = {stat.categoria: stat for stat in all_stats}
+
+        avgs = np.fromiter(
+            (stat.precio_promedio for stat in all_stats),
+            dtype=np.float64,
+            count=len(all_stats)
+        )
+        sorted_avgs = np.sort(avgs)
+        if avgs.size:
+            ranks = np.searchsorted(sorted_avgs, avgs, side="left")
+            pcts = ranks / avgs.size * 100
+        else:
+            pcts = avgs
+
+        percentiles = {
+            stat.categoria: float(pct)
+            for stat, pct in zip(all_stats, pcts)
+        }
+
+        return by_name, percentiles, sorted_avgs
+
+    async def invalidate_cache(self) -> None:
+        """
+        Invalida el caché de estadísticas.
+
+        Debe llamarse cuando se modifican los datos de productos.
         """
-        if "#" in uri:
-            return uri.split("#")[-1]
-        elif "/" in uri:
-            return uri.split("/")[-1]
-        return uri
+        await self._cache.invalidate()
@@ -3,13 +3,20 @@ Servicio de aplicación para comparación de productos.
 Implementa casos de uso relacionados con comparaciones.
 """
 from typing import Optional
-from decimal import Decimal
+from decimal import InvalidOperation
+
+import numpy as np
 
 from app.infrastructure.sparql.client import SPARQLClient
 from app.infrastructure.sparql.queries import ComparisonQueries
 from app.domain.entities import Product, ProductComparison
-from app.core.exceptions import SPARQLQueryError, ProductNotFoundException
-from app.application.product_service import ProductService
+from app.core.exceptions import (
+    ProductNotFoundException,
+    SPARQLException,
+    SPARQLQueryError
+)
+from app.core.uri_utils import last_segment
+from app.application.product_service import ProductService, parse_price
 
 
 class ComparisonService:
@@ -53,22 +60,18 @@ class ComparisonService:
         if len(product_ids) < 2:
             raise ValueError("Se requieren al menos 2 productos para comparar")
 
+        # Acotar el tamaño de la cláusula VALUES (mismo límite que la API)
+        if len(product_ids) > 10:
+            raise ValueError("Se permiten máximo 10 productos para comparar")
+
         try:
-            # Ejecutar consulta SPARQL para comparación
+            # Ejecutar consulta SPARQL para comparación:
+            # un solo round-trip con VALUES en lugar de N consultas por ID
             query = self.queries.compare_products(product_ids)
             result = await self.sparql_client.query(query)
 
-            # Parsear productos
-            products = self._parse_comparison_products(result)
-
-            # Verificar que se encontraron todos los productos
-            if len(products) != len(product_ids):
-                found_ids = {p.id for p in products}
-                missing_ids = set(product_ids) - found_ids
-                raise ProductNotFoundException(
-                    f"Productos no encontrados: {', '.join(missing_ids)}",
-                    {"missing_ids": list(missing_ids)}
-                )
+            # Parsear productos (valida primero que estén todos los IDs)
+            products = self._parse_comparison_products(result, product_ids)
 
             # Crear comparación
             comparison = ProductComparison(productos=products)
@@ -77,7 +80,9 @@ class ComparisonService:
 
         except ProductNotFoundException:
             raise
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al comparar productos: {str(e)}",
                 {"product_ids": product_ids}
@@ -99,30 +104,58 @@ class ComparisonService:
             list[dict]: Lista de productos con score de valor
         """
         try:
-            # Ejecutar consulta SPARQL
-            query = self.queries.find_best_value_in_category(category, limit)
+            # Ejecutar consulta SPARQL (datos crudos de la categoría)
+            query = self.queries.find_best_value_in_category(category)
             result = await self.sparql_client.query(query)
 
-            # Parsear resultados
-            products_with_score = []
             bindings = result.get("results", {}).get("bindings", [])
+            if not bindings:
+                return []
+
+            # Empaquetar en arreglos NumPy y calcular el score vectorizado
+            # (ram + almacenamiento) / precio en una sola pasada
+            ram = np.asarray(
+                [int(b.get("ram", {}).get("value", "0")) for b in bindings],
+                dtype=np.int64
+            )
+            almacenamiento = np.asarray(
+                [int(b.get("almacenamiento", {}).get("value", "0")) for b in bindings],
+                dtype=np.int64
+            )
+            precio = np.asarray(
+                [float(b.get("precio", {}).get("value", "0")) for b in bindings],
+                dtype=np.float64
+            )
+
+            scores = (ram + almacenamiento) / precio
 
-            for binding in bindings:
+            # Seleccionar top-K con argpartition (sin ordenar toda la categoría)
+            if scores.size > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+            else:
+                top = np.arange(scores.size)
+            top = top[np.argsort(-scores[top])]
+
+            products_with_score = []
+            for i in top:
+                binding = bindings[i]
                 uri = binding.get("producto", {}).get("value", "")
-                product_id = self._extract_id_from_uri(uri)
+                product_id = last_segment(uri)
 
                 products_with_score.append({
                     "id": product_id,
                     "nombre": binding.get("nombre", {}).get("value", ""),
-                    "precio": Decimal(binding.get("precio", {}).get("value", "0")),
-                    "ram": int(binding.get("ram", {}).get("value", "0")),
-                    "almacenamiento": int(binding.get("almacenamiento", {}).get("value", "0")),
-                    "valor_score": float(binding.get("valorScore", {}).get("value", "0"))
+                    "precio": parse_price(binding.get("precio", {}).get("value", "0")),
+                    "ram": int(ram[i]),
+                    "almacenamiento": int(almacenamiento[i]),
+                    "valor_score": float(scores[i])
                 })
 
             return products_with_score
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al buscar mejor valor: {str(e)}",
                 {"category": category}
@@ -144,47 +177,74 @@ class ComparisonService:
             dict: Comparación estructurada por especificación
         """
         try:
-            # Obtener productos completos
-            products = []
-            for product_id in product_ids:
-                product = await self.product_service.get_product_by_id(product_id)
-                products.append(product)
+            # Un solo round-trip con VALUES: la misma consulta que
+            # compare_products ya trae todas las especificaciones
+            query = self.queries.compare_products(product_ids)
+            result = await self.sparql_client.query(query)
 
-            # Construir comparación por especificaciones
-            comparison_result = {}
+            products = self._parse_comparison_products(result, product_ids)
 
-            for spec in specifications:
-                comparison_result[spec] = {}
-                for product in products:
-                    value = product.especificaciones.get(spec)
-                    comparison_result[spec][product.id] = value
+            # Construir comparación por especificaciones
+            comparison_result = {
+                spec: {
+                    product.id: product.especificaciones.get(spec)
+                    for product in products
+                }
+                for spec in specifications
+            }
 
             return comparison_result
 
-        except Exception as e:
+        except ProductNotFoundException:
+            raise
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al comparar especificaciones: {str(e)}",
                 {"product_ids": product_ids, "specifications": specifications}
             )
 
-    def _parse_comparison_products(self, sparql_result: dict) -> list[Product]:
+    def _parse_comparison_products(
+        self,
+        sparql_result: dict,
+        expected_ids: Optional[list[str]] = None
+    ) -> list[Product]:
         """
         Parsea resultados SPARQL de comparación a entidades Product.
 
         Args:
             sparql_result: Resultado de consulta SPARQL
+            expected_ids: IDs que deben estar presentes (opcional)
 
         Returns:
             list[Product]: Lista de productos parseados
+
+        Raises:
+            ProductNotFoundException: Si falta alguno de los IDs esperados
         """
-        products = []
         bindings = sparql_result.get("results", {}).get("bindings", [])
 
+        # Primera pasada barata: solo IDs, antes de construir entidades.
+        # Así un ID inexistente falla de inmediato sin parsear el resto
+        if expected_ids is not None:
+            found_ids = {
+                last_segment(binding.get("producto", {}).get("value", ""))
+                for binding in bindings
+            }
+            missing_ids = set(expected_ids) - found_ids
+            if missing_ids:
+                raise ProductNotFoundException(", ".join(sorted(missing_ids)))
+
+        # Lista predimensionada: el tamaño final es casi siempre n
+        products: list = [None] * len(bindings)
+        count = 0
+
         for binding in bindings:
             try:
                 # Extraer ID del URI
                 uri = binding.get("producto", {}).get("value", "")
-                product_id = self._extract_id_from_uri(uri)
+                product_id = last_segment(uri)
 
                 # Crear especificaciones
                 specs = {}
@@ -200,34 +260,20 @@ class ComparisonService:
                     specs["sistema_operativo"] = binding["so"]["value"]
 
                 # Crear producto
-                product = Product(
+                product = Product._fast_new(
                     id=product_id,
                     nombre=binding.get("nombre", {}).get("value", ""),
-                    precio=Decimal(binding.get("precio", {}).get("value", "0")),
+                    precio=parse_price(binding.get("precio", {}).get("value", "0")),
                     especificaciones=specs,
                     uri=uri
                 )
 
-                products.append(product)
+                products[count] = product
+                count += 1
 
-            except (ValueError, KeyError):
+            except (ValueError, KeyError, InvalidOperation):
                 # Saltar productos con datos inválidos
                 continue
 
+        del products[count:]
         return products
-
-    def _extract_id_from_uri(self, uri: str) -> str:
-        """
-        Extrae el ID de un URI.
-
-        Args:
-            uri: URI completo
-
-        Returns:
-            str: ID extraído
-        """
-        if "#" in uri:
-            return uri.split("#")[-1]
-        elif "/" in uri:
-            return uri.split("/")[-1]
-        return uri
@@ -2,15 +2,64 @@
 Servicio de aplicación para gestión de productos.
 Implementa casos de uso relacionados con productos.
 """
-from typing import Optional
-from decimal import Decimal
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator, Optional
+from decimal import Context, Decimal, InvalidOperation
 
 from app.infrastructure.sparql.client import SPARQLClient
 from app.infrastructure.sparql.queries import ProductQueries
 from app.infrastructure.reasoner.engine import ReasonerEngine
 from app.domain.entities import Product
 from app.domain.schemas import ProductSearchParams
-from app.core.exceptions import ProductNotFoundException, SPARQLQueryError
+from app.core.exceptions import (
+    ProductNotFoundException,
+    SPARQLException,
+    SPARQLQueryError
+)
+from app.core.ttl_cache import AsyncTTLCache
+from app.core.uri_utils import last_segment
+
+# TTL del caché de similares: las relaciones esSimilarA cambian con la
+# ontología, no con el tráfico, así que unos minutos de desfase no afectan
+SIMILAR_CACHE_TTL = 300
+
+# TTL del caché de detalle de producto: corto, para que los datos muy
+# consultados (detalle, comparaciones) no repitan la misma consulta en
+# ráfagas sin alejarse demasiado del estado del triplestore
+PRODUCT_CACHE_TTL = 60
+
+# Contexto Decimal acotado para precios: 12 dígitos significativos
+# sobran para montos de marketplace y create_decimal es más barato que
+# arrastrar la precisión por defecto (28) en el parseo masivo
+_PRICE_CTX = Context(prec=12)
+
+
+@lru_cache(maxsize=4096)
+def parse_price(value: str) -> Decimal:
+    """
+    Convierte un literal de precio a Decimal (memoizado).
+
+    Los mismos precios se repiten mucho entre productos y peticiones;
+    Decimal es inmutable, así que compartir instancias es seguro.
+
+    Args:
+        value: Literal de precio del binding SPARQL
+
+    Returns:
+        Decimal: Precio con precisión acotada
+    """
+    return _PRICE_CTX.create_decimal(value)
+
+
+# Tabla de despacho propiedad → (campo del producto, conversor).
+# Evita la cadena if/elif por cada binding: una búsqueda de dict O(1)
+_PROP_MAP = {
+    "tieneNombre": ("nombre", str),
+    "tienePrecio": ("precio", parse_price),
+    "tieneDescripcion": ("descripcion", str),
+    "tieneStock": ("stock", int),
+}
 
 
 class ProductService:
@@ -22,7 +71,8 @@ class ProductService:
     def __init__(
         self,
         sparql_client: SPARQLClient,
-        reasoner: Optional[ReasonerEngine] = None
+        reasoner: Optional[ReasonerEngine] = None,
+        use_fulltext: bool = False
     ):
         """
         Inicializa el servicio de productos.
@@ -30,10 +80,15 @@ class ProductService:
         Args:
             sparql_client: Cliente SPARQL para consultas
             reasoner: Motor de razonamiento (opcional)
+            use_fulltext: Usar el índice Lucene de GraphDB para las
+                búsquedas por palabra clave (requiere índice configurado)
         """
         self.sparql_client = sparql_client
         self.reasoner = reasoner
+        self.use_fulltext = use_fulltext
         self.queries = ProductQueries()
+        self._similar_cache = AsyncTTLCache(maxsize=256, ttl=SIMILAR_CACHE_TTL)
+        self._product_cache = AsyncTTLCache(maxsize=1024, ttl=PRODUCT_CACHE_TTL)
 
     async def get_all_products(
         self,
@@ -60,16 +115,186 @@ class ProductService:
 
             return products
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            raise SPARQLQueryError(
+                f"Error al obtener productos: {str(e)}",
+                {"limit": limit, "offset": offset}
+            )
+
+    async def get_products_page(
+        self,
+        limit: int = 20,
+        offset: int = 0
+    ) -> tuple[list[Product], int]:
+        """
+        Obtiene una página de productos junto con el total real.
+        La página y el COUNT se consultan en paralelo.
+
+        Usa la proyección magra de listado (URI, nombre y precio): los
+        campos de detalle quedan en None y se hidratan por producto con
+        get_product_by_id cuando el cliente abre la ficha.
+
+        Args:
+            limit: Límite de resultados
+            offset: Offset para paginación
+
+        Returns:
+            tuple[list[Product], int]: Productos de la página y total global
+        """
+        try:
+            page_result, count_result = await asyncio.gather(
+                self.sparql_client.query(
+                    self.queries.get_product_list(limit, offset)
+                ),
+                self.sparql_client.query(
+                    self.queries.count_all_products()
+                )
+            )
+
+            products = self._parse_products(page_result)
+            total = self._parse_count(count_result)
+
+            return products, total
+
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener productos: {str(e)}",
                 {"limit": limit, "offset": offset}
             )
 
+    async def search_products_page(
+        self,
+        search_params: ProductSearchParams,
+        limit: int = 20,
+        offset: int = 0
+    ) -> tuple[list[Product], int]:
+        """
+        Busca una página de productos junto con el total real de coincidencias.
+        La página y el COUNT se consultan en paralelo.
+
+        Args:
+            search_params: Parámetros de búsqueda
+            limit: Límite de resultados
+            offset: Offset para paginación
+
+        Returns:
+            tuple[list[Product], int]: Productos de la página y total global
+        """
+        try:
+            filters = {
+                "category": search_params.categoria,
+                "min_price": float(search_params.min_precio) if search_params.min_precio else None,
+                "max_price": float(search_params.max_precio) if search_params.max_precio else None,
+                "marca": search_params.marca,
+                "keyword": search_params.keyword,
+                "use_fulltext": self.use_fulltext
+            }
+
+            page_result, count_result = await asyncio.gather(
+                self.sparql_client.query(
+                    self.queries.search_products(
+                        **filters,
+                        limit=limit,
+                        offset=offset
+                    )
+                ),
+                self.sparql_client.query(
+                    self.queries.count_search_products(**filters)
+                )
+            )
+
+            products = self._parse_products(page_result)
+            total = self._parse_count(count_result)
+
+            return products, total
+
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            raise SPARQLQueryError(
+                f"Error al buscar productos: {str(e)}",
+                {"search_params": search_params.model_dump()}
+            )
+
+    async def iter_all_products(
+        self,
+        page_size: int = 100
+    ) -> AsyncIterator[Product]:
+        """
+        Itera todos los productos página por página.
+        Produce productos a medida que llegan desde SPARQL en lugar
+        de materializar la lista completa en memoria.
+
+        Las páginas se piden por cursor (keyset sobre el URI del último
+        producto visto): a diferencia de OFFSET, el costo por página no
+        crece con la profundidad de la iteración.
+
+        Args:
+            page_size: Tamaño de página de cada consulta SPARQL
+
+        Yields:
+            Product: Producto parseado
+        """
+        after_uri: Optional[str] = None
+
+        while True:
+            query = self.queries.get_all_products_after(after_uri, page_size)
+            rows = 0
+
+            try:
+                # Bindings en streaming: cada producto sale hacia el
+                # consumidor a medida que llega el JSON, sin materializar
+                # la página completa
+                async for binding in self.sparql_client.iter_bindings(query):
+                    rows += 1
+                    after_uri = binding.get("producto", {}).get("value") or after_uri
+                    product = self._product_from_binding(binding)
+                    if product is not None:
+                        yield product
+
+            except SPARQLException:
+                raise
+            except (ValueError, KeyError, TypeError) as e:
+                raise SPARQLQueryError(
+                    f"Error al iterar productos: {str(e)}",
+                    {"page_size": page_size, "after_uri": after_uri}
+                )
+
+            # Última página: no hay más resultados
+            if rows < page_size:
+                return
+
     async def get_product_by_id(self, product_id: str) -> Product:
         """
         Obtiene un producto por su ID.
 
+        Los productos calientes se sirven desde un caché TTL por entidad
+        (las peticiones concurrentes del mismo producto siguen
+        coalescidas en una sola consulta SPARQL); los fallos no se
+        cachean, así que un producto inexistente se re-consulta.
+
+        Args:
+            product_id: ID del producto
+
+        Returns:
+            Product: Producto encontrado
+
+        Raises:
+            ProductNotFoundException: Si el producto no existe
+        """
+        return await self._product_cache.get_or_set(
+            product_id,
+            lambda: self._fetch_product_by_id(product_id)
+        )
+
+    async def _fetch_product_by_id(self, product_id: str) -> Product:
+        """
+        Consulta y construye un producto por su ID (sin coalescer).
+
         Args:
             product_id: ID del producto
 
@@ -87,10 +312,7 @@ class ProductService:
             # Verificar si se encontró el producto
             bindings = result.get("results", {}).get("bindings", [])
             if not bindings:
-                raise ProductNotFoundException(
-                    f"Producto no encontrado: {product_id}",
-                    {"product_id": product_id}
-                )
+                raise ProductNotFoundException(product_id)
 
             # Construir producto desde las propiedades
             product = self._build_product_from_properties(
@@ -102,12 +324,38 @@ class ProductService:
 
         except ProductNotFoundException:
             raise
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener producto: {str(e)}",
                 {"product_id": product_id}
             )
 
+    async def exists(self, product_id: str) -> bool:
+        """
+        Verifica si un producto existe mediante una consulta ASK.
+        Más barato que get_product_by_id cuando solo se necesita
+        la verificación (no materializa propiedades).
+
+        Args:
+            product_id: ID del producto
+
+        Returns:
+            bool: True si el producto existe
+        """
+        try:
+            query = self.queries.product_exists(product_id)
+            return await self.sparql_client.ask(query)
+
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            raise SPARQLQueryError(
+                f"Error al verificar existencia del producto: {str(e)}",
+                {"product_id": product_id}
+            )
+
     async def search_products(
         self,
         search_params: ProductSearchParams,
@@ -134,7 +382,8 @@ class ProductService:
                 marca=search_params.marca,
                 keyword=search_params.keyword,
                 limit=limit,
-                offset=offset
+                offset=offset,
+                use_fulltext=self.use_fulltext
             )
 
             result = await self.sparql_client.query(query)
@@ -144,7 +393,9 @@ class ProductService:
 
             return products
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al buscar productos: {str(e)}",
                 {"search_params": search_params.model_dump()}
@@ -158,6 +409,29 @@ class ProductService:
         """
         Obtiene productos similares usando relaciones semánticas.
 
+        Los resultados se cachean por (producto, límite) con TTL: la
+        consulta con razonamiento es de las más caras del servicio.
+
+        Args:
+            product_id: ID del producto de referencia
+            limit: Límite de resultados
+
+        Returns:
+            list[Product]: Lista de productos similares
+        """
+        return await self._similar_cache.get_or_set(
+            f"{product_id}:{limit}",
+            lambda: self._fetch_similar_products(product_id, limit)
+        )
+
+    async def _fetch_similar_products(
+        self,
+        product_id: str,
+        limit: int = 5
+    ) -> list[Product]:
+        """
+        Consulta y parsea los productos similares (sin caché).
+
         Args:
             product_id: ID del producto de referencia
             limit: Límite de resultados
@@ -183,12 +457,132 @@ class ProductService:
 
             return products
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener productos similares: {str(e)}",
                 {"product_id": product_id}
             )
 
+    async def warm_similar_cache(
+        self,
+        product_ids: list[str],
+        limit: int = 5
+    ) -> None:
+        """
+        Precalienta el caché de similares para una lista de productos.
+
+        Pensado para el arranque de la aplicación: los errores
+        individuales se ignoran (el caché se llenará bajo demanda).
+
+        Args:
+            product_ids: IDs de productos a precalentar
+            limit: Límite de similares por producto
+        """
+        await asyncio.gather(
+            *(
+                self.get_similar_products(product_id, limit)
+                for product_id in product_ids
+            ),
+            return_exceptions=True
+        )
+
+    async def invalidate_similar_cache(
+        self,
+        product_id: Optional[str] = None
+    ) -> None:
+        """
+        Invalida el caché de similares.
+
+        Args:
+            product_id: Producto a invalidar (None invalida todo)
+        """
+        if product_id is None:
+            await self._similar_cache.invalidate()
+        else:
+            await self._similar_cache.invalidate_prefix(f"{product_id}:")
+
+    async def get_related_products(
+        self,
+        product_id: str,
+        limit: int = 10
+    ) -> tuple[list[Product], list[Product]]:
+        """
+        Obtiene productos similares y compatibles en una sola consulta.
+
+        Fusiona las consultas de similares y compatibles en un único
+        SELECT con UNION, ahorrando un viaje al triplestore cuando se
+        necesitan ambas relaciones. Comparte el caché TTL de similares
+        (misma invalidación por prefijo de producto).
+
+        Args:
+            product_id: ID del producto de referencia
+            limit: Límite total de resultados
+
+        Returns:
+            tuple[list[Product], list[Product]]: Similares y compatibles
+        """
+        return await self._similar_cache.get_or_set(
+            f"{product_id}:related:{limit}",
+            lambda: self._fetch_related_products(product_id, limit)
+        )
+
+    async def _fetch_related_products(
+        self,
+        product_id: str,
+        limit: int = 10
+    ) -> tuple[list[Product], list[Product]]:
+        """
+        Consulta y separa los productos relacionados (sin caché).
+
+        Args:
+            product_id: ID del producto de referencia
+            limit: Límite total de resultados
+
+        Returns:
+            tuple[list[Product], list[Product]]: Similares y compatibles
+        """
+        try:
+            # Habilitar razonamiento si está disponible (las relaciones
+            # de similitud pueden ser inferidas)
+            use_reasoning = self.reasoner is not None
+            if use_reasoning:
+                await self.reasoner.ensure_reasoning()
+
+            query = self.queries.get_related_products(product_id, limit)
+            result = await self.sparql_client.query(
+                query,
+                reasoning=use_reasoning
+            )
+
+            # Separar por la etiqueta ?relacion de cada rama UNION;
+            # los equivalentes técnicos cuentan como similares (mismo
+            # contrato que get_similar_products)
+            similares: list[Product] = []
+            compatibles: list[Product] = []
+
+            for binding in result.get("results", {}).get("bindings", []):
+                product = self._product_from_binding(binding)
+                if product is None:
+                    continue
+
+                relation = binding.get("relacion", {}).get("value", "")
+                if relation == "compatible":
+                    compatibles.append(product)
+                else:
+                    similares.append(product)
+
+            return similares, compatibles
+
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            raise SPARQLQueryError(
+                f"Error al obtener productos relacionados: {str(e)}",
+                {"product_id": product_id}
+            )
+
     async def get_compatible_products(
         self,
         product_id: str
@@ -212,7 +606,9 @@ class ProductService:
 
             return products
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener productos compatibles: {str(e)}",
                 {"product_id": product_id}
@@ -242,7 +638,7 @@ class ProductService:
 
             for binding in bindings:
                 incompatibles.append({
-                    "producto_id": self._extract_id_from_uri(
+                    "producto_id": last_segment(
                         binding.get("incompatible", {}).get("value", "")
                     ),
                     "nombre": binding.get("nombre", {}).get("value", ""),
@@ -251,7 +647,9 @@ class ProductService:
 
             return incompatibles
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener productos incompatibles: {str(e)}",
                 {"product_id": product_id}
@@ -267,35 +665,73 @@ class ProductService:
         Returns:
             list[Product]: Lista de productos parseados
         """
-        products = []
         bindings = sparql_result.get("results", {}).get("bindings", [])
 
+        # Lista predimensionada: evita los re-alojamientos de append
+        # durante el crecimiento (el tamaño final es casi siempre n)
+        products: list = [None] * len(bindings)
+        count = 0
+
         for binding in bindings:
-            try:
-                # Extraer ID del URI
-                uri = binding.get("producto", {}).get("value", "")
-                product_id = self._extract_id_from_uri(uri)
-
-                # Crear producto
-                product = Product(
-                    id=product_id,
-                    nombre=binding.get("nombre", {}).get("value", ""),
-                    precio=Decimal(binding.get("precio", {}).get("value", "0")),
-                    descripcion=binding.get("descripcion", {}).get("value"),
-                    stock=int(binding.get("stock", {}).get("value", 0)) if binding.get("stock") else None,
-                    categoria=binding.get("categoria", {}).get("value"),
-                    marca=binding.get("marca", {}).get("value"),
-                    vendedor=binding.get("vendedor", {}).get("value"),
-                    uri=uri
-                )
+            product = self._product_from_binding(binding)
+            if product is not None:
+                products[count] = product
+                count += 1
 
-                products.append(product)
+        del products[count:]
+        return products
 
-            except (ValueError, KeyError) as e:
-                # Saltar productos con datos inválidos
-                continue
+    def _product_from_binding(self, binding: dict) -> Optional[Product]:
+        """
+        Construye una entidad Product desde un binding de listado.
 
-        return products
+        Args:
+            binding: Binding individual de la consulta SPARQL
+
+        Returns:
+            Product: Producto parseado, o None si los datos son inválidos
+        """
+        try:
+            # Extraer ID del URI
+            uri = binding.get("producto", {}).get("value", "")
+            product_id = last_segment(uri)
+
+            return Product._fast_new(
+                id=product_id,
+                nombre=binding.get("nombre", {}).get("value", ""),
+                precio=parse_price(
+                    binding.get("precio", {}).get("value", "0")
+                ),
+                descripcion=binding.get("descripcion", {}).get("value"),
+                stock=int(binding.get("stock", {}).get("value", 0)) if binding.get("stock") else None,
+                categoria=binding.get("categoria", {}).get("value"),
+                marca=binding.get("marca", {}).get("value"),
+                vendedor=binding.get("vendedor", {}).get("value"),
+                uri=uri
+            )
+
+        except (ValueError, KeyError, InvalidOperation):
+            # Saltar productos con datos inválidos
+            return None
+
+    def _parse_count(self, sparql_result: dict) -> int:
+        """
+        Parsea el resultado de una consulta COUNT.
+
+        Args:
+            sparql_result: Resultado de consulta SPARQL
+
+        Returns:
+            int: Total contado (0 si no hay resultado)
+        """
+        bindings = sparql_result.get("results", {}).get("bindings", [])
+        if not bindings:
+            return 0
+
+        try:
+            return int(bindings[0].get("total", {}).get("value", "0"))
+        except (ValueError, KeyError, InvalidOperation):
+            return 0
 
     def _build_product_from_properties(
         self,
@@ -316,21 +752,16 @@ class ProductService:
         props = {}
         specs = {}
 
-        # Procesar cada propiedad
+        # Procesar cada propiedad vía la tabla de despacho
         for binding in bindings:
             prop_uri = binding.get("propiedad", {}).get("value", "")
-            prop_name = prop_uri.split("#")[-1] if "#" in prop_uri else prop_uri
+            prop_name = prop_uri.rpartition("#")[2] or prop_uri
             value = binding.get("valor", {}).get("value", "")
 
-            # Mapear propiedades conocidas
-            if prop_name == "tieneNombre":
-                props["nombre"] = value
-            elif prop_name == "tienePrecio":
-                props["precio"] = Decimal(value)
-            elif prop_name == "tieneDescripcion":
-                props["descripcion"] = value
-            elif prop_name == "tieneStock":
-                props["stock"] = int(value)
+            mapping = _PROP_MAP.get(prop_name)
+            if mapping is not None:
+                field, convert = mapping
+                props[field] = convert(value)
             else:
                 # Almacenar como especificación
                 specs[prop_name] = value
@@ -345,19 +776,3 @@ class ProductService:
             especificaciones=specs,
             uri=f"http://smartcompare.com/ontologia#{product_id}"
         )
-
-    def _extract_id_from_uri(self, uri: str) -> str:
-        """
-        Extrae el ID de un URI.
-
-        Args:
-            uri: URI completo
-
-        Returns:
-            str: ID extraído
-        """
-        if "#" in uri:
-            return uri.split("#")[-1]
-        elif "/" in uri:
-            return uri.split("/")[-1]
-        return uri
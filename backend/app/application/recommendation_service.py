@@ -2,14 +2,55 @@
 Servicio de aplicación para recomendaciones de productos.
 Implementa casos de uso relacionados con recomendaciones semánticas.
 """
-from typing import Optional
-from decimal import Decimal
+from typing import AsyncIterator, Optional
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 
+from app.infrastructure.cache.redis_cache import RedisCache
 from app.infrastructure.sparql.client import SPARQLClient
 from app.infrastructure.sparql.queries import RecommendationQueries
 from app.infrastructure.reasoner.engine import ReasonerEngine
 from app.domain.entities import Product, Recommendation
-from app.core.exceptions import SPARQLQueryError
+from app.core.exceptions import SPARQLException, SPARQLQueryError
+from app.core.singleflight import SingleFlight
+from app.core.uri_utils import last_segment
+from app.application.product_service import parse_price
+
+
+# Reglas de score precompiladas: claves ya en minúsculas y ordenadas por
+# prioridad (score descendente), para que gane la coincidencia más fuerte
+_SCORE_RULES = (
+    ("recomendado por perfil", 1.0),
+    ("similar a compras anteriores", 0.9),
+    ("dentro de presupuesto", 0.8),
+    ("categoría preferida", 0.6),
+)
+
+
+@lru_cache(maxsize=256)
+def _score_from_reason(razon: str) -> float:
+    """
+    Calcula el score asociado a una razón de recomendación (memoizado).
+
+    Las razones provienen de un conjunto fijo de reglas SWRL, por lo que
+    tras las primeras llamadas el cálculo se resuelve sin escanear nada.
+
+    Args:
+        razon: Razón de la recomendación
+
+    Returns:
+        float: Score (0.0 - 1.0)
+    """
+    razon_l = razon.lower()
+    for key, score in _SCORE_RULES:
+        if key in razon_l:
+            return score
+    return 0.5
+
+
+def _sort_key(rec: Recommendation) -> float:
+    """Clave de ordenación por score (las recomendaciones sin score van al final)."""
+    return rec.score if rec.score is not None else float("-inf")
 
 
 class RecommendationService:
@@ -21,7 +62,8 @@ class RecommendationService:
     def __init__(
         self,
         sparql_client: SPARQLClient,
-        reasoner: Optional[ReasonerEngine] = None
+        reasoner: Optional[ReasonerEngine] = None,
+        cache: Optional[RedisCache] = None
     ):
         """
         Inicializa el servicio de recomendaciones.
@@ -29,10 +71,13 @@ class RecommendationService:
         Args:
             sparql_client: Cliente SPARQL para consultas
             reasoner: Motor de razonamiento (opcional)
+            cache: Caché Redis para recomendaciones (opcional)
         """
         self.sparql_client = sparql_client
         self.reasoner = reasoner
         self.queries = RecommendationQueries()
+        self._cache = cache
+        self._flight = SingleFlight()
 
     async def get_recommendations_for_user(
         self,
@@ -55,59 +100,124 @@ class RecommendationService:
             if self.reasoner:
                 await self.reasoner.ensure_reasoning()
 
-            # Ejecutar consulta SPARQL con razonamiento
-            query = self.queries.get_recommendations_for_user(user_id, limit)
-            result = await self.sparql_client.query(
-                query,
-                reasoning=self.reasoner is not None
+            # Clave versionada con el contador de inferencias: un nuevo
+            # razonamiento deja obsoletas las entradas anteriores sin
+            # necesidad de borrarlas explícitamente
+            version = self.reasoner.version if self.reasoner else 0
+            cache_key = f"recs:{user_id}:{limit}:{version}"
+
+            # Llamadas concurrentes idénticas comparten una sola consulta:
+            # el primer llamador la ejecuta y el resto espera su resultado
+            return await self._flight.do(
+                cache_key,
+                lambda: self._fetch_recommendations(cache_key, user_id, limit)
             )
 
-            # Parsear recomendaciones
-            recommendations = self._parse_recommendations(
-                result,
-                user_id
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            raise SPARQLQueryError(
+                f"Error al obtener recomendaciones: {str(e)}",
+                {"user_id": user_id}
             )
 
-            # Ordenar por score (si existe) o por razón
-            recommendations.sort()
+    async def _fetch_recommendations(
+        self,
+        cache_key: str,
+        user_id: str,
+        limit: int
+    ) -> list[Recommendation]:
+        """
+        Resuelve recomendaciones desde el caché o el triplestore.
 
-            return recommendations
+        Args:
+            cache_key: Clave versionada del caché
+            user_id: ID del usuario
+            limit: Límite de recomendaciones
 
-        except Exception as e:
-            raise SPARQLQueryError(
-                f"Error al obtener recomendaciones: {str(e)}",
-                {"user_id": user_id}
+        Returns:
+            list[Recommendation]: Lista de recomendaciones ordenadas
+        """
+        if self._cache is not None:
+            cached = await self._cache.get(cache_key)
+            if cached is not None:
+                return [
+                    self._recommendation_from_dict(item, user_id)
+                    for item in cached
+                ]
+
+        # Ejecutar consulta SPARQL con razonamiento
+        query = self.queries.get_recommendations_for_user(user_id, limit)
+        result = await self.sparql_client.query(
+            query,
+            reasoning=self.reasoner is not None
+        )
+
+        # Parsear recomendaciones
+        recommendations = self._parse_recommendations(result, user_id)
+
+        # Ordenar por score descendente (None al final): la clave se
+        # extrae una sola vez por elemento, sin despachar __lt__ por
+        # comparación
+        recommendations.sort(key=_sort_key, reverse=True)
+
+        if self._cache is not None:
+            await self._cache.set(
+                cache_key,
+                [self._recommendation_to_dict(rec) for rec in recommendations]
             )
 
-    async def get_budget_products(
+        return recommendations
+
+    async def iter_budget_products(
         self,
         user_id: str
-    ) -> list[Product]:
+    ) -> AsyncIterator[Product]:
         """
-        Obtiene productos dentro del presupuesto del usuario.
+        Itera los productos dentro del presupuesto del usuario.
+        Produce productos a medida que llegan desde SPARQL en lugar
+        de materializar la lista completa en memoria.
 
         Args:
             user_id: ID del usuario
 
-        Returns:
-            list[Product]: Lista de productos dentro del presupuesto
+        Yields:
+            Product: Producto dentro del presupuesto
         """
         try:
-            # Ejecutar consulta SPARQL
+            # Consulta sin LIMIT: los bindings llegan en streaming y cada
+            # producto se parsea a medida que entra el JSON, sin
+            # materializar el dict completo de la respuesta en memoria
             query = self.queries.get_user_budget_products(user_id)
-            result = await self.sparql_client.query(query)
 
-            # Parsear productos
-            products = self._parse_products(result)
+            async for binding in self.sparql_client.iter_bindings(query):
+                product = self._product_from_binding(binding)
+                if product is not None:
+                    yield product
 
-            return products
-
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener productos en presupuesto: {str(e)}",
                 {"user_id": user_id}
             )
 
+    async def get_budget_products(
+        self,
+        user_id: str
+    ) -> list[Product]:
+        """
+        Obtiene productos dentro del presupuesto del usuario.
+
+        Args:
+            user_id: ID del usuario
+
+        Returns:
+            list[Product]: Lista de productos dentro del presupuesto
+        """
+        return [p async for p in self.iter_budget_products(user_id)]
+
     async def get_personalized_recommendations(
         self,
         user_id: str,
@@ -128,32 +238,35 @@ class RecommendationService:
             list[Recommendation]: Lista de recomendaciones filtradas
         """
         try:
-            # Obtener recomendaciones base
-            recommendations = await self.get_recommendations_for_user(
-                user_id,
-                limit=limit * 2  # Obtener más para filtrar
-            )
-
-            # Aplicar filtros adicionales
-            filtered = []
-            for rec in recommendations:
-                # Filtro por categoría
-                if category and rec.producto.categoria != category:
-                    continue
+            # Sin filtros adicionales, el flujo base es suficiente
+            if category is None and max_price is None:
+                return await self.get_recommendations_for_user(user_id, limit)
 
-                # Filtro por precio
-                if max_price and rec.producto.precio > max_price:
-                    continue
+            # Asegurar que el razonamiento está actualizado
+            if self.reasoner:
+                await self.reasoner.ensure_reasoning()
 
-                filtered.append(rec)
+            # Filtros empujados al triplestore: no se traen (ni parsean)
+            # filas que luego se descartarían en Python
+            query = self.queries.get_personalized(
+                user_id,
+                category=category,
+                max_price=float(max_price) if max_price is not None else None,
+                limit=limit
+            )
+            result = await self.sparql_client.query(
+                query,
+                reasoning=self.reasoner is not None
+            )
 
-                # Limitar resultados
-                if len(filtered) >= limit:
-                    break
+            recommendations = self._parse_recommendations(result, user_id)
+            recommendations.sort(key=_sort_key, reverse=True)
 
-            return filtered
+            return recommendations
 
-        except Exception as e:
+        except SPARQLException:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
             raise SPARQLQueryError(
                 f"Error al obtener recomendaciones personalizadas: {str(e)}",
                 {"user_id": user_id, "category": category}
@@ -174,20 +287,23 @@ class RecommendationService:
         Returns:
             list[Recommendation]: Lista de recomendaciones parseadas
         """
-        recommendations = []
         bindings = sparql_result.get("results", {}).get("bindings", [])
 
+        # Lista predimensionada: el tamaño final es casi siempre n
+        recommendations: list = [None] * len(bindings)
+        count = 0
+
         for binding in bindings:
             try:
                 # Extraer ID del URI
                 uri = binding.get("producto", {}).get("value", "")
-                product_id = self._extract_id_from_uri(uri)
+                product_id = last_segment(uri)
 
                 # Crear producto
-                product = Product(
+                product = Product._fast_new(
                     id=product_id,
                     nombre=binding.get("nombre", {}).get("value", ""),
-                    precio=Decimal(binding.get("precio", {}).get("value", "0")),
+                    precio=parse_price(binding.get("precio", {}).get("value", "0")),
                     uri=uri
                 )
 
@@ -204,87 +320,94 @@ class RecommendationService:
                     usuario_id=user_id
                 )
 
-                recommendations.append(recommendation)
+                recommendations[count] = recommendation
+                count += 1
 
-            except (ValueError, KeyError):
+            except (ValueError, KeyError, InvalidOperation):
                 # Saltar recomendaciones con datos inválidos
                 continue
 
+        del recommendations[count:]
         return recommendations
 
-    def _parse_products(self, sparql_result: dict) -> list[Product]:
+    def _product_from_binding(self, binding: dict) -> Optional[Product]:
         """
-        Parsea resultados SPARQL a entidades Product.
+        Convierte un binding SPARQL en una entidad Product.
 
         Args:
-            sparql_result: Resultado de consulta SPARQL
+            binding: Binding individual del resultado SPARQL
 
         Returns:
-            list[Product]: Lista de productos parseados
+            Optional[Product]: Producto parseado o None si es inválido
         """
-        products = []
-        bindings = sparql_result.get("results", {}).get("bindings", [])
-
-        for binding in bindings:
-            try:
-                # Extraer ID del URI
-                uri = binding.get("producto", {}).get("value", "")
-                product_id = self._extract_id_from_uri(uri)
-
-                # Crear producto
-                product = Product(
-                    id=product_id,
-                    nombre=binding.get("nombre", {}).get("value", ""),
-                    precio=Decimal(binding.get("precio", {}).get("value", "0")),
-                    uri=uri
-                )
-
-                products.append(product)
-
-            except (ValueError, KeyError):
-                # Saltar productos con datos inválidos
-                continue
+        try:
+            # Extraer ID del URI
+            uri = binding.get("producto", {}).get("value", "")
+
+            return Product._fast_new(
+                id=last_segment(uri),
+                nombre=binding.get("nombre", {}).get("value", ""),
+                precio=parse_price(binding.get("precio", {}).get("value", "0")),
+                uri=uri
+            )
 
-        return products
+        except (ValueError, KeyError, InvalidOperation):
+            # Saltar productos con datos inválidos
+            return None
 
-    def _calculate_score_from_reason(self, razon: str) -> float:
+    @staticmethod
+    def _recommendation_to_dict(rec: Recommendation) -> dict:
         """
-        Calcula un score basado en la razón de recomendación.
+        Serializa una recomendación a un dict apto para el caché.
 
         Args:
-            razon: Razón de la recomendación
+            rec: Recomendación a serializar
 
         Returns:
-            float: Score (0.0 - 1.0)
+            dict: Representación serializable
         """
-        # Mapear razones a scores
-        score_map = {
-            "Recomendado por perfil": 1.0,
-            "Dentro de presupuesto": 0.8,
-            "Categoría preferida": 0.6,
-            "Similar a compras anteriores": 0.9,
+        return {
+            "id": rec.producto.id,
+            "nombre": rec.producto.nombre,
+            "precio": str(rec.producto.precio),
+            "uri": rec.producto.uri,
+            "razon": rec.razon,
+            "score": rec.score
         }
 
-        # Buscar coincidencia parcial
-        for key, score in score_map.items():
-            if key.lower() in razon.lower():
-                return score
+    @staticmethod
+    def _recommendation_from_dict(item: dict, user_id: str) -> Recommendation:
+        """
+        Reconstruye una recomendación desde el dict cacheado.
+
+        Args:
+            item: Representación serializada
+            user_id: ID del usuario
 
-        # Score por defecto
-        return 0.5
+        Returns:
+            Recommendation: Recomendación reconstruida
+        """
+        product = Product._fast_new(
+            id=item["id"],
+            nombre=item["nombre"],
+            precio=Decimal(item["precio"]),
+            uri=item["uri"]
+        )
+        return Recommendation(
+            producto=product,
+            razon=item["razon"],
+            score=item["score"],
+            usuario_id=user_id
+        )
 
-    def _extract_id_from_uri(self, uri: str) -> str:
+    def _calculate_score_from_reason(self, razon: str) -> float:
         """
-        Extrae el ID de un URI.
+        Calcula un score basado en la razón de recomendación.
 
         Args:
-            uri: URI completo
+            razon: Razón de la recomendación
 
         Returns:
-            str: ID extraído
+            float: Score (0.0 - 1.0)
         """
-        if "#" in uri:
-            return uri.split("#")[-1]
-        elif "/" in uri:
-            return uri.split("/")[-1]
-        return uri
+        return _score_from_reason(razon)
@@ -52,6 +52,19 @@ class Settings(BaseSettings):
     # SPARQL Query Configuration
     SPARQL_TIMEOUT: int = 30  # seconds
     MAX_QUERY_RESULTS: int = 1000
+    # Usa el conector Lucene de GraphDB para búsqueda por palabra clave
+    # (requiere un índice full-text configurado en el repositorio)
+    GRAPHDB_FULLTEXT_ENABLED: bool = False
+    # Consulta la membresía de categoría vía el predicado materializado
+    # sc:enCategoria en lugar del property path rdf:type/rdfs:subClassOf*
+    # (el cierre se materializa con un INSERT al arrancar)
+    GRAPHDB_MATERIALIZED_CATEGORIES: bool = False
+
+    # HTTP Client Pool Configuration (cliente compartido hacia GraphDB)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    HTTP_KEEPALIVE_EXPIRY: int = 60  # seconds
+    HTTP_CONNECT_RETRIES: int = 1
 
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
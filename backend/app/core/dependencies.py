@@ -2,10 +2,14 @@
 Módulo de dependencias para inyección en FastAPI.
 Implementa el patrón Dependency Injection siguiendo principios SOLID.
 """
-from typing import Annotated
+from functools import lru_cache
+from typing import Annotated, Optional
 from fastapi import Depends, Header, HTTPException, status
+from redis.asyncio import Redis
 
 from app.core.config import Settings, get_settings
+from app.core.singleflight import SingleFlight
+from app.infrastructure.cache.redis_cache import RedisCache
 from app.infrastructure.sparql.client import SPARQLClient
 from app.infrastructure.ontology.loader import OntologyLoader
 from app.infrastructure.reasoner.engine import ReasonerEngine
@@ -54,12 +58,95 @@ async def get_sparql_client(
 SPARQLClientDep = Annotated[SPARQLClient, Depends(get_sparql_client)]
 
 
+# Cliente Redis compartido (se crea una sola vez por proceso)
+_redis_client: Optional[Redis] = None
+
+
+# Dependencia del cliente Redis para caché
+async def get_redis_client(
+    settings: SettingsDep
+) -> Optional[Redis]:
+    """
+    Crea y retorna un cliente Redis para caché de respuestas.
+    Reutiliza una única instancia por proceso (pool de conexiones).
+
+    Args:
+        settings: Configuración de la aplicación
+
+    Returns:
+        Redis: Cliente Redis o None si el caché está deshabilitado
+    """
+    global _redis_client
+
+    if not settings.CACHE_ENABLED or not settings.REDIS_URL:
+        return None
+
+    if _redis_client is None:
+        _redis_client = Redis.from_url(settings.REDIS_URL)
+
+    return _redis_client
+
+
+# Tipo anotado para cliente Redis
+RedisDep = Annotated[Optional[Redis], Depends(get_redis_client)]
+
+
+# Dependencia del caché Redis de aplicación
+async def get_redis_cache(
+    redis: RedisDep,
+    settings: SettingsDep
+) -> Optional[RedisCache]:
+    """
+    Retorna el caché Redis de aplicación, o None si está deshabilitado.
+
+    Args:
+        redis: Cliente Redis compartido
+        settings: Configuración de la aplicación
+
+    Returns:
+        RedisCache: Caché configurado con el TTL por defecto
+    """
+    if redis is None:
+        return None
+
+    return RedisCache(redis, default_ttl=settings.CACHE_TTL)
+
+
+# Tipo anotado para caché Redis
+RedisCacheDep = Annotated[Optional[RedisCache], Depends(get_redis_cache)]
+
+
+# Coalescador single-flight compartido por proceso
+_single_flight = SingleFlight()
+
+
+# Dependencia del coalescador single-flight
+def get_single_flight() -> SingleFlight:
+    """
+    Retorna el coalescador single-flight compartido.
+    Agrupa llamadas concurrentes idénticas en una sola ejecución.
+
+    Returns:
+        SingleFlight: Coalescador compartido
+    """
+    return _single_flight
+
+
+# Tipo anotado para coalescador single-flight
+SingleFlightDep = Annotated[SingleFlight, Depends(get_single_flight)]
+
+
+# Cargador de ontologías compartido (se crea una sola vez por proceso)
+_ontology_loader: Optional[OntologyLoader] = None
+
+
 # Dependencia del cargador de ontologías
 async def get_ontology_loader(
     settings: SettingsDep
 ) -> OntologyLoader:
     """
-    Crea y retorna un cargador de ontologías.
+    Retorna el cargador de ontologías compartido.
+    Reutiliza una única instancia por proceso (la ontología ya cargada).
 
     Args:
         settings: Configuración de la aplicación
@@ -67,29 +154,38 @@ async def get_ontology_loader(
     Returns:
         OntologyLoader: Cargador de ontologías configurado
     """
-    loader = OntologyLoader(
-        ontology_path=settings.ONTOLOGY_FILE_PATH,
-        base_uri=settings.ONTOLOGY_BASE_URI
-    )
+    global _ontology_loader
+
+    if _ontology_loader is None:
+        _ontology_loader = OntologyLoader(
+            ontology_path=settings.ONTOLOGY_FILE_PATH,
+            base_uri=settings.ONTOLOGY_BASE_URI
+        )
 
     # Cargar ontología si no está cargada
-    if not loader.is_loaded():
-        await loader.load()
+    if not _ontology_loader.is_loaded():
+        await _ontology_loader.load()
 
-    return loader
+    return _ontology_loader
 
 
 # Tipo anotado para cargador de ontologías
 OntologyLoaderDep = Annotated[OntologyLoader, Depends(get_ontology_loader)]
 
 
+# Motor de razonamiento compartido (se crea una sola vez por proceso)
+_reasoner_engine: Optional[ReasonerEngine] = None
+
+
 # Dependencia del motor de razonamiento
 async def get_reasoner_engine(
     ontology_loader: OntologyLoaderDep,
     settings: SettingsDep
 ) -> ReasonerEngine:
     """
-    Crea y retorna un motor de razonamiento.
+    Retorna el motor de razonamiento compartido.
+    Reutiliza una única instancia por proceso, de modo que el caché de
+    inferencias y su contador de versión sobrevivan entre requests.
 
     Args:
         ontology_loader: Cargador de ontologías
@@ -98,16 +194,20 @@ async def get_reasoner_engine(
     Returns:
         ReasonerEngine: Motor de razonamiento configurado
     """
+    global _reasoner_engine
+
     if not settings.ENABLE_REASONING:
         return None
 
-    engine = ReasonerEngine(
-        ontology=ontology_loader.get_ontology(),
-        reasoner_type=settings.REASONER_TYPE,
-        cache_ttl=settings.REASONING_CACHE_TTL
-    )
+    if _reasoner_engine is None:
+        _reasoner_engine = ReasonerEngine(
+            ontology=ontology_loader.get_ontology(),
+            reasoner_type=settings.REASONER_TYPE,
+            cache_ttl=settings.REASONING_CACHE_TTL,
+            source_path=settings.ONTOLOGY_FILE_PATH
+        )
 
-    return engine
+    return _reasoner_engine
 
 
 # Tipo anotado para motor de razonamiento
@@ -143,21 +243,18 @@ APIKeyDep = Annotated[str, Depends(verify_api_key)]
 
 # Dependencia de paginación
 class PaginationParams:
-    """Parámetros de paginación reutilizables."""
-
-    def __init__(
-        self,
-        page: int = 1,
-        page_size: int = 20,
-        settings: Settings = Depends(get_current_settings)
-    ):
+    """Parámetros de paginación reutilizables (inmutables tras crearse)."""
+
+    __slots__ = ("page", "page_size", "offset", "limit")
+
+    def __init__(self, page: int, page_size: int, max_size: int):
         """
         Inicializa parámetros de paginación.
 
         Args:
             page: Número de página (empezando en 1)
             page_size: Tamaño de página
-            settings: Configuración de la aplicación
+            max_size: Tamaño máximo de página permitido
         """
         if page < 1:
             raise HTTPException(
@@ -166,7 +263,6 @@ class PaginationParams:
             )
 
         # Limitar tamaño de página
-        max_size = settings.MAX_PAGE_SIZE
         if page_size > max_size:
             page_size = max_size
 
@@ -182,5 +278,43 @@ class PaginationParams:
         self.limit = page_size
 
 
+# Los clientes repiten casi siempre las mismas combinaciones de página y
+# tamaño, así que la instancia validada se memoiza; las combinaciones
+# inválidas lanzan HTTPException y lru_cache nunca las almacena
+@lru_cache(maxsize=1024)
+def _make_pagination(page: int, page_size: int, max_size: int) -> PaginationParams:
+    """
+    Construye (o reutiliza) parámetros de paginación validados.
+
+    Args:
+        page: Número de página (empezando en 1)
+        page_size: Tamaño de página
+        max_size: Tamaño máximo de página permitido
+
+    Returns:
+        PaginationParams: Instancia validada compartida
+    """
+    return PaginationParams(page, page_size, max_size)
+
+
+def get_pagination_params(
+    page: int = 1,
+    page_size: int = 20,
+    settings: Settings = Depends(get_current_settings)
+) -> PaginationParams:
+    """
+    Obtiene los parámetros de paginación del request.
+
+    Args:
+        page: Número de página (empezando en 1)
+        page_size: Tamaño de página
+        settings: Configuración de la aplicación
+
+    Returns:
+        PaginationParams: Parámetros validados
+    """
+    return _make_pagination(page, page_size, settings.MAX_PAGE_SIZE)
+
+
 # Tipo anotado para paginación
-PaginationDep = Annotated[PaginationParams, Depends()]
+PaginationDep = Annotated[PaginationParams, Depends(get_pagination_params)]
@@ -0,0 +1,57 @@
+"""
+Decorador de manejo uniforme de errores para endpoints.
+Centraliza el mapeo de excepciones de dominio a códigos HTTP.
+"""
+import functools
+from typing import Any, Awaitable, Callable
+
+from fastapi import HTTPException, status
+
+from app.core.exceptions import ProductNotFoundException
+
+
+def wrap_errors(
+    message: str
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Envuelve un endpoint asíncrono con el manejo de errores estándar.
+
+    Mapeo aplicado:
+    - HTTPException se propaga sin cambios
+    - ProductNotFoundException -> 404
+    - ValueError -> 400
+    - Cualquier otra excepción -> 500 con el mensaje indicado
+
+    Args:
+        message: Prefijo del detalle para errores inesperados
+
+    Returns:
+        Callable: Decorador para el endpoint
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+
+            except HTTPException:
+                raise
+            except ProductNotFoundException as e:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=str(e)
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"{message}: {str(e)}"
+                )
+
+        return wrapper
+
+    return decorator
@@ -2,6 +2,7 @@
 Custom exceptions for SmartCompareMarket API.
 Follows Open/Closed Principle - extensible but not modifiable.
 """
+from functools import lru_cache
 from typing import Any, Optional
 from fastapi import HTTPException, status
 
@@ -99,22 +100,31 @@ class RecommendationException(SmartCompareMarketException):
 
 
 # HTTP Exception Handlers
+# Las excepciones sin parámetros son singletons a nivel de módulo y las
+# parametrizadas se memoizan: FastAPI solo lee status_code/detail, así que
+# reutilizar la instancia evita alocar en cada error bajo ráfagas
+_ONTOLOGY_NOT_FOUND = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Ontology service is not available"
+)
+
+_SPARQL_CONNECTION = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Database connection failed"
+)
+
+
 def ontology_not_found_exception() -> HTTPException:
     """Returns HTTPException for ontology not found."""
-    return HTTPException(
-        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-        detail="Ontology service is not available"
-    )
+    return _ONTOLOGY_NOT_FOUND
 
 
 def sparql_connection_exception() -> HTTPException:
     """Returns HTTPException for SPARQL connection error."""
-    return HTTPException(
-        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-        detail="Database connection failed"
-    )
+    return _SPARQL_CONNECTION
 
 
+@lru_cache(maxsize=256)
 def product_not_found_exception(product_id: str) -> HTTPException:
     """Returns HTTPException for product not found."""
     return HTTPException(
@@ -123,6 +133,7 @@ def product_not_found_exception(product_id: str) -> HTTPException:
     )
 
 
+@lru_cache(maxsize=256)
 def invalid_query_exception(message: str) -> HTTPException:
     """Returns HTTPException for invalid query."""
     return HTTPException(
@@ -131,6 +142,7 @@ def invalid_query_exception(message: str) -> HTTPException:
     )
 
 
+@lru_cache(maxsize=256)
 def reasoning_failed_exception(message: str) -> HTTPException:
     """Returns HTTPException for reasoning failure."""
     return HTTPException(
@@ -0,0 +1,46 @@
+"""
+Coalescador de llamadas asíncronas idénticas (single-flight).
+Evita que ráfagas de peticiones concurrentes dupliquen trabajo.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma clave en una sola ejecución.
+    Las llamadas que llegan mientras hay una en vuelo esperan su resultado
+    en lugar de disparar trabajo duplicado (ej: la misma consulta SPARQL).
+    """
+
+    def __init__(self):
+        """Inicializa el registro de llamadas en vuelo."""
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def do(
+        self,
+        key: str,
+        coro_factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Ejecuta la corrutina o espera el resultado de una ya en vuelo.
+
+        Args:
+            key: Clave que identifica la llamada
+            coro_factory: Función sin argumentos que crea la corrutina
+
+        Returns:
+            Any: Resultado de la llamada (compartido entre esperas)
+        """
+        existing = self._inflight.get(key)
+        if existing is not None:
+            # Ya hay una llamada idéntica en vuelo: compartir su resultado
+            return await existing
+
+        task = asyncio.create_task(coro_factory())
+        self._inflight[key] = task
+
+        try:
+            return await task
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,110 @@
+"""
+Caché LRU con expiración (TTL) para uso con asyncio.
+Evita repetir consultas costosas cuyos resultados cambian poco.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+
+class AsyncTTLCache:
+    """
+    Caché LRU en memoria con TTL por entrada, seguro para asyncio.
+
+    Las llamadas concurrentes con la misma clave se coalescen: solo una
+    corrutina ejecuta la carga y el resto espera el mismo resultado.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: int = 60):
+        """
+        Inicializa el caché.
+
+        Args:
+            maxsize: Cantidad máxima de entradas (se expulsa la menos usada)
+            ttl: Tiempo de vida por defecto de cada entrada en segundos
+        """
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    async def get_or_set(
+        self,
+        key: str,
+        coro_factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Retorna el valor cacheado o lo calcula y lo guarda.
+
+        Args:
+            key: Clave de la entrada
+            coro_factory: Función sin argumentos que retorna la corrutina
+                que calcula el valor
+            ttl: TTL específico para esta entrada (opcional)
+
+        Returns:
+            Any: Valor cacheado o recién calculado
+        """
+        ttl = self._ttl if ttl is None else ttl
+
+        async with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    return value
+                del self._data[key]
+
+            # Coalescer: si ya hay una carga en vuelo, esperar la misma
+            task = self._inflight.get(key)
+            is_owner = task is None
+            if is_owner:
+                task = asyncio.create_task(coro_factory())
+                self._inflight[key] = task
+
+        try:
+            value = await task
+        finally:
+            if is_owner:
+                self._inflight.pop(key, None)
+
+        if is_owner:
+            async with self._lock:
+                self._data[key] = (time.monotonic() + ttl, value)
+                self._data.move_to_end(key)
+                while len(self._data) > self._maxsize:
+                    self._data.popitem(last=False)
+
+        return value
+
+    async def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Elimina una entrada del caché, o todas si no se indica clave.
+
+        Args:
+            key: Clave a invalidar (None invalida todo)
+        """
+        async with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    async def invalidate_prefix(self, prefix: str) -> None:
+        """
+        Elimina todas las entradas cuya clave comienza con el prefijo.
+
+        Útil cuando una misma entidad genera varias claves (por ejemplo
+        "producto:limite").
+
+        Args:
+            prefix: Prefijo de las claves a invalidar
+        """
+        async with self._lock:
+            stale = [k for k in self._data if k.startswith(prefix)]
+            for k in stale:
+                del self._data[k]
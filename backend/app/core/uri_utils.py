@@ -0,0 +1,26 @@
+"""
+Utilidades para manipulación de URIs de la ontología.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def last_segment(uri: str) -> str:
+    """
+    Extrae el último segmento de un URI (tras '#' o '/').
+
+    Usa rpartition (una sola pasada, sin lista intermedia) y memoiza el
+    resultado: los URIs de categorías, marcas y vendedores se repiten
+    muchas veces dentro de una misma respuesta.
+
+    Args:
+        uri: URI completo
+
+    Returns:
+        str: Segmento extraído, o el URI original si no hay separador
+    """
+    head, sep, tail = uri.rpartition("#")
+    if sep:
+        return tail
+
+    return uri.rpartition("/")[2] or uri
@@ -8,7 +8,7 @@ from decimal import Decimal
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     """
     Entidad Producto - Representa un producto en el marketplace.
@@ -32,6 +32,40 @@ class Product:
         if self.stock is not None and self.stock < 0:
             raise ValueError("El stock no puede ser negativo")
 
+    @classmethod
+    def _fast_new(
+        cls,
+        id: str,
+        nombre: str,
+        precio: Decimal,
+        descripcion: Optional[str] = None,
+        stock: Optional[int] = None,
+        categoria: Optional[str] = None,
+        marca: Optional[str] = None,
+        vendedor: Optional[str] = None,
+        especificaciones: Optional[dict[str, Any]] = None,
+        uri: Optional[str] = None
+    ) -> 'Product':
+        """
+        Construye un producto sin pasar por __init__/__post_init__.
+
+        Solo para los parseos masivos de resultados SPARQL, donde los
+        datos vienen del propio triplestore y la validación por instancia
+        no aporta.
+        """
+        self = object.__new__(cls)
+        self.id = id
+        self.nombre = nombre
+        self.precio = precio
+        self.descripcion = descripcion
+        self.stock = stock
+        self.categoria = categoria
+        self.marca = marca
+        self.vendedor = vendedor
+        self.especificaciones = {} if especificaciones is None else especificaciones
+        self.uri = uri
+        return self
+
     @property
     def disponible(self) -> bool:
         """Verifica si el producto está disponible."""
@@ -60,7 +94,7 @@ class Product:
         self.stock = nuevo_stock
 
 
-@dataclass
+@dataclass(slots=True)
 class ProductComparison:
     """
     Entidad que representa una comparación entre productos.
@@ -102,14 +136,17 @@ class ProductComparison:
                 producto.especificaciones.get(key)
                 for producto in self.productos
             ]
-            # Solo agregar si hay diferencias
-            if len(set(str(v) for v in valores)) > 1:
+            # Solo agregar si hay diferencias: basta encontrar un valor
+            # distinto del primero para cortar, sin construir un set de
+            # representaciones por criterio
+            primero = str(valores[0])
+            if any(str(v) != primero for v in valores[1:]):
                 diferencias[key] = valores
 
         return diferencias
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """
     Entidad Usuario - Representa un usuario del marketplace.
@@ -157,7 +194,7 @@ class User:
         return precio <= self.presupuesto_maximo
 
 
-@dataclass
+@dataclass(slots=True)
 class Recommendation:
     """
     Entidad Recomendación - Representa una recomendación de producto.
@@ -176,33 +213,74 @@ class Recommendation:
         return self.score > other.score  # Mayor score primero
 
 
-@dataclass
+@dataclass(slots=True)
 class MarketStats:
     """
     Entidad que representa estadísticas del mercado.
+
+    Los precios son agregados (float): alimentan sumas y percentiles,
+    donde la exactitud de Decimal no aporta y sí cuesta.
     """
     categoria: str
-    precio_minimo: Decimal
-    precio_maximo: Decimal
-    precio_promedio: Decimal
+    precio_minimo: float
+    precio_maximo: float
+    precio_promedio: float
     total_productos: int
 
+    @classmethod
+    def _fast_new(
+        cls,
+        categoria: str,
+        precio_minimo: float,
+        precio_maximo: float,
+        precio_promedio: float,
+        total_productos: int
+    ) -> 'MarketStats':
+        """Construye estadísticas sin pasar por __init__ (parseo masivo)."""
+        self = object.__new__(cls)
+        self.categoria = categoria
+        self.precio_minimo = precio_minimo
+        self.precio_maximo = precio_maximo
+        self.precio_promedio = precio_promedio
+        self.total_productos = total_productos
+        return self
+
     @property
-    def rango_precio(self) -> Decimal:
+    def rango_precio(self) -> float:
         """Calcula el rango de precios."""
         return self.precio_maximo - self.precio_minimo
 
 
-@dataclass
+@dataclass(slots=True)
 class VendorStats:
     """
     Entidad que representa estadísticas de un vendedor.
+
+    Los precios son agregados (float), igual que en MarketStats.
     """
     vendedor: str
     total_productos: int
-    precio_promedio: Decimal
-    precio_minimo: Decimal
-    precio_maximo: Decimal
+    precio_promedio: float
+    precio_minimo: float
+    precio_maximo: float
+
+    @classmethod
+    def _fast_new(
+        cls,
+        vendedor: str,
+        total_productos: int,
+        precio_promedio: float,
+        precio_minimo: float,
+        precio_maximo: float
+    ) -> 'VendorStats':
+        """Construye estadísticas sin pasar por __init__ (parseo masivo)."""
+        self = object.__new__(cls)
+        self.vendedor = vendedor
+        self.total_productos = total_productos
+        self.precio_promedio = precio_promedio
+        self.precio_minimo = precio_minimo
+        self.precio_maximo = precio_maximo
+        return self
 
     @property
     def precio_competitivo(self) -> bool:
@@ -2,10 +2,11 @@
 Schemas Pydantic para validación y serialización de datos.
 Separa la capa de API de la capa de dominio.
 """
+from functools import lru_cache
 from typing import Optional, Any
 from decimal import Decimal
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict, field_validator
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, field_validator
 
 from app.domain import examples
 
@@ -119,6 +120,12 @@ class ProductComparisonRequest(BaseModel):
     )
 
 
+class CompareBySpecsRequest(BaseModel):
+    """Schema para solicitar comparación por especificaciones."""
+    product_ids: list[str] = Field(..., min_length=2, max_length=10)
+    specifications: list[str] = Field(..., min_length=1)
+
+
 class ProductComparisonResponse(BaseModel):
     """Schema para respuesta de comparación."""
     productos: list[ProductResponse]
@@ -241,6 +248,35 @@ class BrandStatsResponse(BaseModel):
     precio_promedio: Decimal
 
 
+class MarketTopEntity(BaseModel):
+    """Schema para la entidad con más productos (categoría o vendedor)."""
+    nombre: str
+    productos: int
+
+
+class MarketOverviewResponse(BaseModel):
+    """Schema para resumen general del mercado."""
+    total_categorias: int
+    total_vendedores: int
+    total_marcas: int
+    precio_promedio_global: Decimal
+    categoria_top: Optional[MarketTopEntity] = None
+    vendedor_top: Optional[MarketTopEntity] = None
+
+
+class CategoryInsightsResponse(BaseModel):
+    """Schema para insights de una categoría."""
+    categoria: str
+    encontrada: bool
+    precio_minimo: Decimal
+    precio_maximo: Decimal
+    precio_promedio: Decimal
+    rango_precio: Decimal
+    total_productos: int
+    percentil_precio: float
+    precio_competitivo: bool
+
+
 # ============================================================================
 # SCHEMAS DE PRODUCTOS RELACIONADOS
 # ============================================================================
@@ -251,6 +287,13 @@ class SimilarProductsResponse(BaseModel):
     productos_similares: list[ProductResponse]
 
 
+class RelatedProductsResponse(BaseModel):
+    """Schema para productos relacionados (similares y compatibles)."""
+    producto_origen: ProductResponse
+    productos_similares: list[ProductResponse]
+    productos_compatibles: list[ProductResponse]
+
+
 class CompatibleProductsResponse(BaseModel):
     """Schema para productos compatibles."""
     producto_origen: ProductResponse
@@ -303,3 +346,25 @@ class HealthCheckResponse(BaseModel):
             "example": examples.HEALTH_CHECK_EXAMPLE
         }
     )
+
+
+# ============================================================================
+# ADAPTADORES COMPARTIDOS
+# ============================================================================
+
+@lru_cache(maxsize=32)
+def get_adapter(tp: Any) -> TypeAdapter:
+    """
+    Retorna un TypeAdapter compartido para el tipo dado.
+
+    Construir un adaptador recorre todo el core schema del tipo, así que
+    cada tipo se construye una sola vez por proceso y los routers lo
+    reutilizan en lugar de instanciar el suyo propio.
+
+    Args:
+        tp: Tipo a adaptar (ej. list[ProductResponse])
+
+    Returns:
+        TypeAdapter: Adaptador compartido para el tipo
+    """
+    return TypeAdapter(tp)
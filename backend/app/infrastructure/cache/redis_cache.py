@@ -0,0 +1,87 @@
+"""
+Caché Redis para resultados de aplicación.
+Implementa el patrón Repository sobre el almacén clave-valor.
+"""
+from typing import Any, Optional
+
+import orjson
+from redis.asyncio import Redis
+
+
+class RedisCache:
+    """
+    Envoltorio fino sobre Redis para cachear valores serializables a JSON.
+
+    Los errores de Redis se tratan como miss: el caché es una
+    optimización y nunca debe tumbar la petición que lo usa.
+    """
+
+    def __init__(self, redis: Redis, default_ttl: int = 300):
+        """
+        Inicializa el caché.
+
+        Args:
+            redis: Cliente Redis asíncrono compartido
+            default_ttl: TTL por defecto de cada entrada en segundos
+        """
+        self._redis = redis
+        self._default_ttl = default_ttl
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Obtiene y decodifica un valor del caché.
+
+        Args:
+            key: Clave de la entrada
+
+        Returns:
+            Any: Valor decodificado, o None si no existe o hay error
+        """
+        try:
+            raw = await self._redis.get(key)
+        except Exception:
+            return None
+
+        if raw is None:
+            return None
+
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return None
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None
+    ) -> None:
+        """
+        Serializa y guarda un valor en el caché.
+
+        Args:
+            key: Clave de la entrada
+            value: Valor serializable a JSON
+            ttl: TTL específico en segundos (opcional)
+        """
+        try:
+            await self._redis.set(
+                key,
+                orjson.dumps(value, default=str),
+                ex=ttl or self._default_ttl
+            )
+        except Exception:
+            # El caché nunca debe propagar errores hacia la petición
+            pass
+
+    async def delete(self, key: str) -> None:
+        """
+        Elimina una entrada del caché.
+
+        Args:
+            key: Clave a eliminar
+        """
+        try:
+            await self._redis.delete(key)
+        except Exception:
+            pass
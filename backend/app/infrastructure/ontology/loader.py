@@ -2,6 +2,7 @@
 Cargador de ontologías OWL usando owlready2.
 Implementa el patrón Singleton para la ontología cargada.
 """
+from collections import deque
 from typing import Optional
 from pathlib import Path
 import owlready2 as owl
@@ -35,6 +36,11 @@ class OntologyLoader:
         self.base_uri = base_uri
         self.ontology: Optional[owl.Ontology] = None
         self._loaded = False
+        # Namespace resuelto una sola vez y caché de entidades por nombre
+        # (getattr sobre el namespace re-resuelve el URI en cada llamada)
+        self._namespace: Optional[owl.Namespace] = None
+        self._entity_cache: dict[str, Optional[object]] = {}
+        self._stats_cache: Optional[dict] = None
 
     async def load(self) -> owl.Ontology:
         """
@@ -64,6 +70,11 @@ class OntologyLoader:
                 f"file://{self.ontology_path.absolute()}"
             ).load()
 
+            # Precalcular el namespace y vaciar los cachés derivados
+            self._namespace = self.ontology.get_namespace(self.base_uri)
+            self._entity_cache.clear()
+            self._stats_cache = None
+
             self._loaded = True
             return self.ontology
 
@@ -104,6 +115,30 @@ class OntologyLoader:
             )
         return self.ontology
 
+    def _resolve(self, name: str) -> Optional[object]:
+        """
+        Resuelve una entidad del namespace por nombre, con caché.
+
+        Los resultados (incluidos los negativos) se memoizan: la
+        resolución vía getattr recorre el índice de owlready2 y los
+        mismos nombres se consultan una y otra vez.
+
+        Args:
+            name: Nombre de la entidad (sin prefijo)
+
+        Returns:
+            Optional[object]: Entidad encontrada o None
+        """
+        if not self.is_loaded():
+            return None
+
+        try:
+            return self._entity_cache[name]
+        except KeyError:
+            entity = getattr(self._namespace, name, None)
+            self._entity_cache[name] = entity
+            return entity
+
     def get_class(self, class_name: str) -> Optional[owl.ThingClass]:
         """
         Obtiene una clase de la ontología por su nombre.
@@ -114,12 +149,7 @@ class OntologyLoader:
         Returns:
             owl.ThingClass: Clase encontrada o None
         """
-        if not self.is_loaded():
-            return None
-
-        # Buscar la clase en el namespace
-        namespace = self.ontology.get_namespace(self.base_uri)
-        return getattr(namespace, class_name, None)
+        return self._resolve(class_name)
 
     def get_property(self, property_name: str) -> Optional[owl.PropertyClass]:
         """
@@ -131,12 +161,7 @@ class OntologyLoader:
         Returns:
             owl.PropertyClass: Propiedad encontrada o None
         """
-        if not self.is_loaded():
-            return None
-
-        # Buscar la propiedad en el namespace
-        namespace = self.ontology.get_namespace(self.base_uri)
-        return getattr(namespace, property_name, None)
+        return self._resolve(property_name)
 
     def get_individual(self, individual_name: str) -> Optional[owl.Thing]:
         """
@@ -148,12 +173,7 @@ class OntologyLoader:
         Returns:
             owl.Thing: Individuo encontrado o None
         """
-        if not self.is_loaded():
-            return None
-
-        # Buscar el individuo en el namespace
-        namespace = self.ontology.get_namespace(self.base_uri)
-        return getattr(namespace, individual_name, None)
+        return self._resolve(individual_name)
 
     def search_classes(
         self,
@@ -179,8 +199,8 @@ class OntologyLoader:
                 return []
 
             if include_subclasses:
-                # Obtener todas las subclases (recursivamente)
-                return list(parent.descendants())
+                # Obtener todas las subclases (BFS iterativo)
+                return self._bfs_descendants(parent)
             else:
                 # Solo subclases directas
                 return list(parent.subclasses())
@@ -188,6 +208,36 @@ class OntologyLoader:
             # Todas las clases definidas en la ontología
             return list(self.ontology.classes())
 
+    @staticmethod
+    def _bfs_descendants(parent: owl.ThingClass) -> list[owl.ThingClass]:
+        """
+        Recorre las subclases de una clase en anchura, sin recursión.
+
+        descendants() de owlready2 hace uniones de conjuntos recursivas
+        que se degradan en jerarquías profundas; un BFS con conjunto de
+        visitados toca cada clase una sola vez.
+
+        Args:
+            parent: Clase raíz del recorrido
+
+        Returns:
+            list[owl.ThingClass]: La raíz y todas sus subclases
+        """
+        # descendants() incluye la propia clase; se preserva ese contrato
+        seen = {parent}
+        queue = deque([parent])
+        result = [parent]
+
+        while queue:
+            current = queue.popleft()
+            for subclass in current.subclasses():
+                if subclass not in seen:
+                    seen.add(subclass)
+                    result.append(subclass)
+                    queue.append(subclass)
+
+        return result
+
     def search_individuals(
         self,
         class_name: Optional[str] = None
@@ -261,6 +311,9 @@ class OntologyLoader:
         """
         self._loaded = False
         self.ontology = None
+        self._namespace = None
+        self._entity_cache.clear()
+        self._stats_cache = None
         return await self.load()
 
     def get_stats(self) -> dict:
@@ -278,12 +331,17 @@ class OntologyLoader:
                 "properties": 0
             }
 
-        return {
-            "loaded": True,
-            "classes": len(list(self.ontology.classes())),
-            "individuals": len(list(self.ontology.individuals())),
-            "object_properties": len(list(self.ontology.object_properties())),
-            "data_properties": len(list(self.ontology.data_properties())),
-            "annotation_properties": len(list(self.ontology.annotation_properties())),
-            "base_iri": self.ontology.base_iri
-        }
+        # Los conteos son invariantes entre recargas: se calculan una vez
+        # (contando sin materializar listas) y se sirven desde el caché
+        if self._stats_cache is None:
+            self._stats_cache = {
+                "loaded": True,
+                "classes": sum(1 for _ in self.ontology.classes()),
+                "individuals": sum(1 for _ in self.ontology.individuals()),
+                "object_properties": sum(1 for _ in self.ontology.object_properties()),
+                "data_properties": sum(1 for _ in self.ontology.data_properties()),
+                "annotation_properties": sum(1 for _ in self.ontology.annotation_properties()),
+                "base_iri": self.ontology.base_iri
+            }
+
+        return self._stats_cache
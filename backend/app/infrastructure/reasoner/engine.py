@@ -2,10 +2,13 @@
 Motor de razonamiento semántico usando Pellet o FaCT++.
 Implementa el patrón Strategy para diferentes tipos de reasoners.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Any, Literal
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from pathlib import Path
 import owlready2 as owl
-from functools import lru_cache
 
 from app.core.exceptions import (
     ReasonerError,
@@ -14,6 +17,23 @@ from app.core.exceptions import (
 )
 
 
+# Estrategias de razonamiento disponibles (patrón Strategy); getattr
+# porque no todas las builds de owlready2 exponen fact++
+_REASONER_FUNCS = {
+    "pellet": owl.sync_reasoner_pellet,
+    "hermit": owl.sync_reasoner_hermit,
+    "fact++": getattr(owl, "sync_reasoner_factpp", None),
+}
+
+# Executor de un solo worker para el razonamiento: el reasoner no es
+# reentrante, y un worker único serializa las ejecuciones mientras el
+# event loop sigue atendiendo requests
+_REASONER_POOL = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix="reasoner"
+)
+
+
 class ReasonerEngine:
     """
     Motor de razonamiento para inferencias sobre la ontología.
@@ -25,7 +45,8 @@ class ReasonerEngine:
         self,
         ontology: owl.Ontology,
         reasoner_type: Literal["pellet", "hermit", "fact++"] = "pellet",
-        cache_ttl: int = 300  # 5 minutos
+        cache_ttl: int = 300,  # 5 minutos
+        source_path: Optional[str] = None
     ):
         """
         Inicializa el motor de razonamiento.
@@ -34,12 +55,34 @@ class ReasonerEngine:
             ontology: Ontología sobre la cual razonar
             reasoner_type: Tipo de reasoner a usar
             cache_ttl: Tiempo de vida del caché en segundos
+            source_path: Ruta del archivo OWL de origen (opcional); si se
+                proporciona, la validez del caché se liga al contenido
+                del archivo en lugar de expirar por TTL
         """
         self.ontology = ontology
         self.reasoner_type = reasoner_type
         self.cache_ttl = cache_ttl
+        # Resolver la estrategia una sola vez; un tipo inválido falla
+        # aquí, en la construcción, y no recién al razonar
+        self._reasoner_func = _REASONER_FUNCS.get(reasoner_type)
+        if self._reasoner_func is None:
+            raise ReasonerError(
+                f"Tipo de reasoner no soportado: {reasoner_type}",
+                {"reasoner_type": reasoner_type}
+            )
+        # Namespace resuelto una sola vez para las búsquedas por nombre
+        self._namespace = ontology.get_namespace(
+            "http://smartcompare.com/ontologia#"
+        )
         self._last_reasoning_time: Optional[datetime] = None
         self._cache_valid = False
+        # Firma (mtime, tamaño) del archivo OWL al momento del último
+        # razonamiento: si no cambió, la inferencia sigue siendo correcta
+        self._source_path = Path(source_path) if source_path else None
+        self._source_signature: Optional[tuple[int, int]] = None
+        # Contador de versiones de inferencia: los cachés externos lo
+        # incluyen en sus claves para invalidarse tras cada razonamiento
+        self.version = 0
 
     async def run_inference(
         self,
@@ -64,30 +107,25 @@ class ReasonerEngine:
             ReasonerTimeoutError: Si el razonamiento excede el timeout
         """
         try:
-            # Seleccionar función de razonamiento según el tipo
-            if self.reasoner_type == "pellet":
-                reasoner_func = owl.sync_reasoner_pellet
-            elif self.reasoner_type == "hermit":
-                reasoner_func = owl.sync_reasoner_hermit
-            elif self.reasoner_type == "fact++":
-                reasoner_func = owl.sync_reasoner_factpp
-            else:
-                raise ReasonerError(
-                    f"Tipo de reasoner no soportado: {self.reasoner_type}",
-                    {"reasoner_type": self.reasoner_type}
+            # Ejecutar razonamiento (estrategia resuelta en __init__) en
+            # el executor: Pellet es un proceso Java síncrono que de otro
+            # modo bloquearía el event loop durante segundos
+            await asyncio.get_running_loop().run_in_executor(
+                _REASONER_POOL,
+                partial(
+                    self._reasoner_func,
+                    [self.ontology],
+                    infer_property_values=infer_properties,
+                    infer_data_property_values=infer_data_properties,
+                    debug=debug
                 )
-
-            # Ejecutar razonamiento
-            reasoner_func(
-                [self.ontology],
-                infer_property_values=infer_properties,
-                infer_data_property_values=infer_data_properties,
-                debug=debug
             )
 
-            # Actualizar timestamp y caché
+            # Actualizar timestamp, caché y versión
             self._last_reasoning_time = datetime.now()
             self._cache_valid = True
+            self._source_signature = self._current_signature()
+            self.version += 1
 
             return True
 
@@ -107,16 +145,42 @@ class ReasonerEngine:
                 {"reasoner": self.reasoner_type}
             )
 
+    def _current_signature(self) -> Optional[tuple[int, int]]:
+        """
+        Obtiene la firma (mtime, tamaño) actual del archivo OWL.
+
+        Returns:
+            Optional[tuple[int, int]]: Firma del archivo o None si no
+                hay ruta de origen o el archivo no es accesible
+        """
+        if self._source_path is None:
+            return None
+
+        try:
+            stat = self._source_path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
     def is_cache_valid(self) -> bool:
         """
         Verifica si el caché de razonamiento es válido.
 
+        Si se conoce el archivo OWL de origen, la validez se liga a su
+        contenido: mientras no cambie, la inferencia previa sigue siendo
+        correcta y no se vuelve a ejecutar Pellet solo porque pasó el
+        TTL. Sin ruta de origen se conserva la expiración por TTL.
+
         Returns:
             bool: True si el caché es válido
         """
         if not self._cache_valid or not self._last_reasoning_time:
             return False
 
+        # Validez por contenido: sin cambios en el archivo, sin re-ejecución
+        if self._source_signature is not None:
+            return self._current_signature() == self._source_signature
+
         # Verificar si ha pasado el TTL
         elapsed = datetime.now() - self._last_reasoning_time
         return elapsed.total_seconds() < self.cache_ttl
@@ -176,21 +240,17 @@ class ReasonerEngine:
         """
         try:
             # Obtener el individuo
-            namespace = self.ontology.get_namespace(
-                "http://smartcompare.com/ontologia#"
-            )
-            individual = getattr(namespace, individual_name, None)
+            individual = getattr(self._namespace, individual_name, None)
 
             if not individual:
                 return []
 
             # Obtener clases inferidas (is_a después del razonamiento)
-            inferred_classes = []
-            for cls in individual.is_a:
-                if isinstance(cls, owl.ThingClass):
-                    inferred_classes.append(cls.name)
-
-            return inferred_classes
+            return [
+                cls.name
+                for cls in individual.is_a
+                if isinstance(cls, owl.ThingClass)
+            ]
 
         except Exception as e:
             raise ReasonerError(
@@ -215,27 +275,19 @@ class ReasonerEngine:
         """
         try:
             # Obtener el individuo
-            namespace = self.ontology.get_namespace(
-                "http://smartcompare.com/ontologia#"
-            )
-            individual = getattr(namespace, individual_name, None)
+            individual = getattr(self._namespace, individual_name, None)
 
             if not individual:
                 return []
 
             # Obtener la propiedad
-            prop = getattr(namespace, property_name, None)
+            prop = getattr(self._namespace, property_name, None)
             if not prop:
                 return []
 
-            # Obtener valores de la propiedad
+            # Obtener valores de la propiedad (normalizados a lista)
             values = getattr(individual, property_name, [])
-
-            # Convertir a lista si no lo es
-            if not isinstance(values, list):
-                values = [values]
-
-            return values
+            return values if isinstance(values, list) else [values]
 
         except Exception as e:
             raise ReasonerError(
@@ -265,12 +317,8 @@ class ReasonerEngine:
             # Asegurar que el razonamiento está actualizado
             await self.ensure_reasoning()
 
-            namespace = self.ontology.get_namespace(
-                "http://smartcompare.com/ontologia#"
-            )
-
-            individual = getattr(namespace, individual_name, None)
-            cls = getattr(namespace, class_name, None)
+            individual = getattr(self._namespace, individual_name, None)
+            cls = getattr(self._namespace, class_name, None)
 
             if not individual or not cls:
                 return []
@@ -283,9 +331,11 @@ class ReasonerEngine:
                     f"{individual_name} es directamente de tipo {class_name}"
                 )
 
-            # Verificar propiedades que podrían inferir la membresía
+            # Verificar propiedades que podrían inferir la membresía:
+            # prop[individual] lee los valores directo del índice, sin
+            # pasar por la resolución de atributos por nombre
             for prop in individual.get_properties():
-                values = getattr(individual, prop.name, [])
+                values = prop[individual]
                 if values:
                     explanations.append(
                         f"{individual_name} tiene {prop.name} = {values}"
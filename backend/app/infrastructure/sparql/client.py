@@ -2,8 +2,12 @@
 Cliente SPARQL para consultas a GraphDB/Stardog.
 Implementa el patrón Repository para acceso a datos.
 """
-from typing import Any, Optional
+import re
+from functools import lru_cache
+from typing import Any, AsyncIterator, Optional
 import httpx
+import ijson
+import orjson
 from urllib.parse import urljoin
 
 from app.core.exceptions import (
@@ -12,6 +16,64 @@ from app.core.exceptions import (
 )
 
 
+# Bloque de prefijos comunes, construido una sola vez a nivel de módulo
+_PREFIXES = """
+PREFIX sc: <http://smartcompare.com/ontologia#>
+PREFIX owl: <http://www.w3.org/2002/07/owl#>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+"""
+
+# Detecta un PREFIX inicial (con comentarios por delante) sin recorrer
+# ni copiar en mayúsculas la consulta completa
+_HAS_PREFIX = re.compile(
+    r"\s*(?:#[^\n]*\n\s*)*PREFIX\b",
+    re.IGNORECASE
+).match
+
+
+@lru_cache(maxsize=512)
+def _with_prefixes(query: str) -> str:
+    """
+    Antepone los prefijos comunes a una consulta (memoizado).
+
+    Los builders de queries.py memoizan sus textos, así que las mismas
+    consultas llegan aquí una y otra vez: la concatenación se paga una
+    sola vez por texto distinto.
+
+    Args:
+        query: Consulta SPARQL original
+
+    Returns:
+        str: Consulta con prefijos agregados
+    """
+    # Si la consulta ya tiene prefijos, no duplicar
+    if _HAS_PREFIX(query):
+        return query
+
+    return _PREFIXES + query
+
+
+class _AsyncByteReader:
+    """Adapta un iterador de bytes al protocolo de lectura async de ijson."""
+
+    def __init__(self, byte_iterator):
+        self._iterator = byte_iterator
+
+    async def read(self, size: int = -1) -> bytes:
+        """Retorna el siguiente chunk del cuerpo HTTP (vacío al terminar)."""
+        # ijson hace read(0) para detectar bytes vs str: no consumir nada
+        if size == 0:
+            return b""
+
+        try:
+            return await self._iterator.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+
 class SPARQLClient:
     """
     Cliente para ejecutar consultas SPARQL contra GraphDB/Stardog.
@@ -24,7 +86,8 @@ class SPARQLClient:
         repository: str,
         username: Optional[str] = None,
         password: Optional[str] = None,
-        timeout: int = 30
+        timeout: int = 30,
+        http_client: Optional[httpx.AsyncClient] = None
     ):
         """
         Inicializa el cliente SPARQL.
@@ -35,6 +98,8 @@ class SPARQLClient:
             username: Usuario (opcional)
             password: Contraseña (opcional)
             timeout: Timeout para consultas en segundos
+            http_client: Cliente HTTP compartido (opcional); si no se
+                proporciona, se crea uno propio
         """
         self.endpoint_url = endpoint_url
         self.repository = repository
@@ -51,15 +116,30 @@ class SPARQLClient:
         if username and password:
             self.auth = (username, password)
 
-        # Cliente HTTP asíncrono
-        self.client = httpx.AsyncClient(
-            auth=self.auth,
-            timeout=timeout,
-            headers={
-                "Accept": "application/sparql-results+json",
-                "Content-Type": "application/sparql-query"
-            }
-        )
+        # Headers por consulta (el cliente compartido no los trae por defecto)
+        self._headers = {
+            "Accept": "application/sparql-results+json",
+            "Content-Type": "application/sparql-query"
+        }
+
+        # Para ASK: GraphDB/RDF4J responde "true"/"false" en texto plano,
+        # evitando construir y parsear el envoltorio JSON
+        self._ask_headers = {
+            "Accept": "text/boolean",
+            "Content-Type": "application/sparql-query"
+        }
+
+        # Cliente HTTP asíncrono: reutilizar el compartido del proceso si
+        # existe (keep-alive entre consultas, sin handshake TCP/TLS por query)
+        if http_client is not None:
+            self.client = http_client
+            self._owns_client = False
+        else:
+            self.client = httpx.AsyncClient(
+                auth=self.auth,
+                timeout=timeout
+            )
+            self._owns_client = True
 
     async def query(
         self,
@@ -93,12 +173,14 @@ class SPARQLClient:
             response = await self.client.post(
                 self.sparql_endpoint,
                 content=query_with_prefixes,
-                params=params
+                params=params,
+                headers=self._headers
             )
 
-            # Verificar respuesta
+            # Verificar respuesta (orjson decodifica el cuerpo bastante
+            # más rápido que el json estándar en resultados grandes)
             if response.status_code == 200:
-                return response.json()
+                return orjson.loads(response.content)
             else:
                 raise SPARQLQueryError(
                     f"SPARQL query failed with status {response.status_code}: {response.text}",
@@ -123,6 +205,66 @@ class SPARQLClient:
                 {"query": sparql_query}
             )
 
+    async def iter_bindings(
+        self,
+        sparql_query: str,
+        reasoning: bool = False
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Ejecuta una consulta SELECT y produce los bindings en streaming.
+
+        El cuerpo JSON se parsea incrementalmente con ijson a medida que
+        llega por HTTP, sin materializar la lista completa de bindings
+        (ni el grafo de dicts intermedio) en memoria.
+
+        Args:
+            sparql_query: Consulta SPARQL
+            reasoning: Si se debe habilitar razonamiento
+
+        Yields:
+            dict: Un binding a la vez
+
+        Raises:
+            SPARQLQueryError: Si la consulta falla
+            SPARQLConnectionError: Si hay error de conexión
+        """
+        query_with_prefixes = self._add_prefixes(sparql_query)
+
+        params = {}
+        if reasoning:
+            params["infer"] = "true"
+
+        try:
+            async with self.client.stream(
+                "POST",
+                self.sparql_endpoint,
+                content=query_with_prefixes,
+                params=params,
+                headers=self._headers
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise SPARQLQueryError(
+                        f"SPARQL query failed with status {response.status_code}: "
+                        f"{body.decode(errors='replace')}",
+                        {"query": sparql_query, "status": response.status_code}
+                    )
+
+                reader = _AsyncByteReader(response.aiter_bytes())
+                async for binding in ijson.items(reader, "results.bindings.item"):
+                    yield binding
+
+        except httpx.ConnectError as e:
+            raise SPARQLConnectionError(
+                f"Failed to connect to SPARQL endpoint: {str(e)}",
+                {"endpoint": self.sparql_endpoint}
+            )
+        except httpx.TimeoutException as e:
+            raise SPARQLQueryError(
+                f"SPARQL query timeout: {str(e)}",
+                {"query": sparql_query, "timeout": self.timeout}
+            )
+
     async def update(self, sparql_update: str) -> bool:
         """
         Ejecuta una actualización SPARQL INSERT/DELETE.
@@ -150,7 +292,10 @@ class SPARQLClient:
             response = await self.client.post(
                 update_endpoint,
                 content=update_with_prefixes,
-                headers={"Content-Type": "application/sparql-update"}
+                headers={
+                    **self._headers,
+                    "Content-Type": "application/sparql-update"
+                }
             )
 
             return response.status_code in [200, 204]
@@ -179,12 +324,12 @@ class SPARQLClient:
 
             response = await self.client.post(
                 self.sparql_endpoint,
-                content=query_with_prefixes
+                content=query_with_prefixes,
+                headers=self._ask_headers
             )
 
             if response.status_code == 200:
-                result = response.json()
-                return result.get("boolean", False)
+                return response.content.strip() == b"true"
             else:
                 raise SPARQLQueryError(
                     f"SPARQL ASK query failed: {response.text}",
@@ -209,23 +354,12 @@ class SPARQLClient:
         Returns:
             str: Consulta con prefijos agregados
         """
-        prefixes = """
-PREFIX sc: <http://smartcompare.com/ontologia#>
-PREFIX owl: <http://www.w3.org/2002/07/owl#>
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-
-"""
-        # Si la consulta ya tiene prefijos, no duplicar
-        if "PREFIX" in query.upper():
-            return query
-
-        return prefixes + query
+        return _with_prefixes(query)
 
     async def close(self):
-        """Cierra el cliente HTTP."""
-        await self.client.aclose()
+        """Cierra el cliente HTTP (solo si es propio, no el compartido)."""
+        if self._owns_client:
+            await self.client.aclose()
 
     async def __aenter__(self):
         """Context manager entry."""
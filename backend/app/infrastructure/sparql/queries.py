@@ -2,30 +2,145 @@
 Consultas SPARQL predefinidas para el marketplace.
 Implementa el patrón Query Object para encapsular consultas complejas.
 """
+import re
+from functools import lru_cache
 from typing import Optional
 
+from app.core.config import get_settings
 
-class ProductQueries:
-    """Consultas SPARQL relacionadas con productos."""
 
-    @staticmethod
-    def get_all_products(limit: int = 20, offset: int = 0) -> str:
-        """
-        Obtiene todos los productos con sus propiedades básicas.
+# ============================================================================
+# MEMBRESÍA DE CATEGORÍA
+# ============================================================================
 
-        Args:
-            limit: Límite de resultados
-            offset: Offset para paginación
+# Con el cierre transitivo materializado (predicado sc:enCategoria, ver
+# materialize_category_closure), la membresía de categoría es una
+# búsqueda directa de predicado; sin él, GraphDB evalúa el property path
+# rdf:type/rdfs:subClassOf* con punto fijo en cada consulta
+_USE_MATERIALIZED = get_settings().GRAPHDB_MATERIALIZED_CATEGORIES
 
-        Returns:
-            str: Consulta SPARQL
-        """
-        return f"""
+
+def _member_of(subject: str, category: str) -> str:
+    """
+    Construye el patrón de membresía de un sujeto en una categoría.
+
+    Args:
+        subject: Sujeto del patrón (variable o término sc:)
+        category: Categoría (nombre local o variable con ?)
+
+    Returns:
+        str: Patrón SPARQL de membresía
+    """
+    prefixed = category if category.startswith("?") else f"sc:{category}"
+
+    if _USE_MATERIALIZED:
+        return f"{subject} sc:enCategoria {prefixed} ."
+
+    return f"{subject} rdf:type/rdfs:subClassOf* {prefixed} ."
+
+
+# ============================================================================
+# VALIDACIÓN DE NOMBRES LOCALES
+# ============================================================================
+
+# Caracteres permitidos en un nombre local interpolado en posición sc:
+# (IDs de productos, usuarios y categorías). Todo lo demás se rechaza en
+# Python antes de enviar cualquier SPARQL: cierra la inyección vía IDs.
+_LOCAL_NAME_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]{0,128}")
+
+
+# Caracteres con significado especial en la sintaxis de consulta Lucene
+_LUCENE_SPECIALS = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def _escape_lucene(value: str) -> str:
+    """
+    Escapa los operadores de la sintaxis de consulta Lucene.
+
+    Args:
+        value: Palabra clave del usuario
+
+    Returns:
+        str: Palabra clave tratada como texto plano por Lucene
+    """
+    return _LUCENE_SPECIALS.sub(r"\\\1", value)
+
+
+# Longitud máxima de texto libre (marca, palabra clave) interpolado en
+# filtros: acota el costo de evaluar CONTAINS sobre entradas arbitrarias
+_MAX_FILTER_TEXT = 256
+
+
+def _escape_literal(value: str) -> str:
+    """
+    Escapa un valor para interpolarlo como literal SPARQL entre comillas.
+
+    Args:
+        value: Valor original
+
+    Returns:
+        str: Valor con barras, comillas y saltos de línea escapados
+    """
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _validate_local_name(name: str) -> str:
+    """
+    Valida un nombre local antes de interpolarlo en una consulta.
+
+    Args:
+        name: Nombre local (sin prefijo sc:)
+
+    Returns:
+        str: El mismo nombre, ya validado
+
+    Raises:
+        ValueError: Si el nombre contiene caracteres fuera del allow-list
+    """
+    if not _LOCAL_NAME_RE.fullmatch(name):
+        raise ValueError(f"Nombre local SPARQL inválido: {name!r}")
+    return name
+
+
+# ============================================================================
+# PLANTILLAS SPARQL (construidas una sola vez a nivel de módulo)
+# ============================================================================
+
+_ALL_PRODUCTS_TMPL = """
+SELECT DISTINCT ?producto ?nombre ?precio ?descripcion ?stock ?marca ?vendedor
+WHERE {{
+    ?producto rdf:type/rdfs:subClassOf* sc:Producto .
+    ?producto sc:tieneNombre ?nombre .
+    ?producto sc:tienePrecio ?precio .
+
+    OPTIONAL {{ ?producto sc:tieneDescripcion ?descripcion }}
+    OPTIONAL {{ ?producto sc:tieneStock ?stock }}
+    OPTIONAL {{
+        ?producto sc:tieneMarca ?marcaUri .
+        ?marcaUri sc:tieneNombre ?marca .
+    }}
+    OPTIONAL {{
+        ?producto sc:vendidoPor ?vendedorUri .
+        ?vendedorUri sc:tieneNombre ?vendedor .
+    }}
+}}
+ORDER BY ?nombre
+LIMIT {limit}
+OFFSET {offset}
+"""
+
+_ALL_PRODUCTS_AFTER_TMPL = """
 SELECT DISTINCT ?producto ?nombre ?precio ?descripcion ?stock ?marca ?vendedor
 WHERE {{
     ?producto rdf:type/rdfs:subClassOf* sc:Producto .
     ?producto sc:tieneNombre ?nombre .
     ?producto sc:tienePrecio ?precio .
+    {filter_clause}
 
     OPTIONAL {{ ?producto sc:tieneDescripcion ?descripcion }}
     OPTIONAL {{ ?producto sc:tieneStock ?stock }}
@@ -38,12 +153,192 @@ WHERE {{
         ?vendedorUri sc:tieneNombre ?vendedor .
     }}
 }}
+ORDER BY ?producto
+LIMIT {limit}
+"""
+
+# Proyección magra para vistas de listado: sin OPTIONALs, cada uno
+# multiplica el resultado intermedio y el payload JSON; el detalle se
+# hidrata por producto con get_product_by_id
+_PRODUCT_LIST_TMPL = """
+SELECT DISTINCT ?producto ?nombre ?precio
+WHERE {{
+    ?producto rdf:type/rdfs:subClassOf* sc:Producto .
+    ?producto sc:tieneNombre ?nombre .
+    ?producto sc:tienePrecio ?precio .
+}}
 ORDER BY ?nombre
 LIMIT {limit}
 OFFSET {offset}
 """
 
+_SEARCH_PRODUCTS_TMPL = """
+SELECT DISTINCT ?producto ?nombre ?precio ?stock ?marca ?vendedor ?categoria
+WHERE {{
+    ?producto rdf:type ?categoria .
+    ?producto rdf:type/rdfs:subClassOf* sc:Producto .
+    ?producto sc:tieneNombre ?nombre .
+    ?producto sc:tienePrecio ?precio .
+
+    {filter_clause}
+
+    OPTIONAL {{ ?producto sc:tieneStock ?stock }}
+    OPTIONAL {{
+        ?producto sc:tieneMarca ?marcaUri .
+        ?marcaUri sc:tieneNombre ?marca .
+    }}
+    OPTIONAL {{
+        ?producto sc:vendidoPor ?vendedorUri .
+        ?vendedorUri sc:tieneNombre ?vendedor .
+    }}
+}}
+ORDER BY ?precio
+LIMIT {limit}
+OFFSET {offset}
+"""
+
+_COUNT_SEARCH_PRODUCTS_TMPL = """
+SELECT (COUNT(DISTINCT ?producto) AS ?total)
+WHERE {{
+    ?producto rdf:type ?categoria .
+    ?producto rdf:type/rdfs:subClassOf* sc:Producto .
+    ?producto sc:tieneNombre ?nombre .
+    ?producto sc:tienePrecio ?precio .
+
+    {filter_clause}
+}}
+"""
+
+# La membresía de Producto en las plantillas respeta la configuración
+# del proceso (predicado materializado o property path)
+_PATH_MEMBER = "?producto rdf:type/rdfs:subClassOf* sc:Producto ."
+_MEMBER_PRODUCTO = _member_of("?producto", "Producto")
+_MEMBER_PREF = _member_of("?producto", "?categoria")
+_ALL_PRODUCTS_TMPL = _ALL_PRODUCTS_TMPL.replace(_PATH_MEMBER, _MEMBER_PRODUCTO)
+_ALL_PRODUCTS_AFTER_TMPL = _ALL_PRODUCTS_AFTER_TMPL.replace(
+    _PATH_MEMBER, _MEMBER_PRODUCTO
+)
+_PRODUCT_LIST_TMPL = _PRODUCT_LIST_TMPL.replace(_PATH_MEMBER, _MEMBER_PRODUCTO)
+_SEARCH_PRODUCTS_TMPL = _SEARCH_PRODUCTS_TMPL.replace(
+    _PATH_MEMBER, _MEMBER_PRODUCTO
+)
+_COUNT_SEARCH_PRODUCTS_TMPL = _COUNT_SEARCH_PRODUCTS_TMPL.replace(
+    _PATH_MEMBER, _MEMBER_PRODUCTO
+)
+
+_COUNT_ALL_PRODUCTS_QUERY = """
+SELECT (COUNT(DISTINCT ?producto) AS ?total)
+WHERE {
+    ?producto rdf:type/rdfs:subClassOf* sc:Producto .
+    ?producto sc:tieneNombre ?nombre .
+    ?producto sc:tienePrecio ?precio .
+}
+""".replace(_PATH_MEMBER, _MEMBER_PRODUCTO)
+
+
+class ProductQueries:
+    """Consultas SPARQL relacionadas con productos."""
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def get_all_products(limit: int = 20, offset: int = 0) -> str:
+        """
+        Obtiene todos los productos con sus propiedades básicas.
+
+        Args:
+            limit: Límite de resultados
+            offset: Offset para paginación
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        return _ALL_PRODUCTS_TMPL.format(limit=limit, offset=offset)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def get_product_list(limit: int = 20, offset: int = 0) -> str:
+        """
+        Obtiene el listado magro de productos (URI, nombre y precio).
+
+        Sin los OPTIONALs de descripción, stock, marca y vendedor: cada
+        uno agrega un join por producto y engorda el payload, y la vista
+        de listado no los muestra. El detalle completo se hidrata por
+        producto con get_product_by_id.
+
+        Args:
+            limit: Límite de resultados
+            offset: Offset para paginación
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        return _PRODUCT_LIST_TMPL.format(limit=limit, offset=offset)
+
     @staticmethod
+    @lru_cache(maxsize=64)
+    def get_all_products_after(
+        after_uri: Optional[str] = None,
+        limit: int = 100
+    ) -> str:
+        """
+        Obtiene una página de productos por cursor (paginación keyset).
+
+        A diferencia de OFFSET — que obliga al triplestore a materializar
+        y ordenar todas las filas anteriores en cada página — el filtro
+        por URI del último producto visto mantiene cada página en
+        O(limit) sin importar cuán profunda sea la iteración.
+
+        Args:
+            after_uri: URI del último producto de la página anterior
+                (None para la primera página)
+            limit: Límite de resultados
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        filter_clause = ""
+        if after_uri:
+            filter_clause = (
+                f'FILTER(STR(?producto) > "{_escape_literal(after_uri)}")'
+            )
+
+        return _ALL_PRODUCTS_AFTER_TMPL.format(
+            filter_clause=filter_clause,
+            limit=limit
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def product_exists(product_id: str) -> str:
+        """
+        Verifica si existe un producto, sin materializar sus propiedades.
+
+        Args:
+            product_id: ID del producto
+
+        Returns:
+            str: Consulta SPARQL ASK
+        """
+        _validate_local_name(product_id)
+        member = _member_of(f"sc:{product_id}", "Producto")
+        return f"""
+ASK {{
+    {member}
+}}
+"""
+
+    @staticmethod
+    def count_all_products() -> str:
+        """
+        Cuenta el total de productos disponibles.
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        return _COUNT_ALL_PRODUCTS_QUERY
+
+    @staticmethod
+    @lru_cache(maxsize=128)
     def get_product_by_id(product_id: str) -> str:
         """
         Obtiene un producto específico con todas sus propiedades.
@@ -54,6 +349,7 @@ OFFSET {offset}
         Returns:
             str: Consulta SPARQL
         """
+        _validate_local_name(product_id)
         return f"""
 SELECT ?propiedad ?valor
 WHERE {{
@@ -62,6 +358,7 @@ WHERE {{
 """
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def search_products(
         category: Optional[str] = None,
         min_price: Optional[float] = None,
@@ -69,7 +366,8 @@ WHERE {{
         marca: Optional[str] = None,
         keyword: Optional[str] = None,
         limit: int = 20,
-        offset: int = 0
+        offset: int = 0,
+        use_fulltext: bool = False
     ) -> str:
         """
         Búsqueda de productos con filtros semánticos.
@@ -82,15 +380,91 @@ WHERE {{
             keyword: Palabra clave en nombre o descripción
             limit: Límite de resultados
             offset: Offset para paginación
+            use_fulltext: Usar el índice Lucene de GraphDB para keyword
 
         Returns:
             str: Consulta SPARQL
         """
+        filter_clause = ProductQueries._build_search_filters(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            marca=marca,
+            keyword=keyword,
+            use_fulltext=use_fulltext
+        )
+
+        return _SEARCH_PRODUCTS_TMPL.format(
+            filter_clause=filter_clause,
+            limit=limit,
+            offset=offset
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def count_search_products(
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        marca: Optional[str] = None,
+        keyword: Optional[str] = None,
+        use_fulltext: bool = False
+    ) -> str:
+        """
+        Cuenta el total de productos que coinciden con los filtros.
+
+        Args:
+            category: Categoría de producto
+            min_price: Precio mínimo
+            max_price: Precio máximo
+            marca: Marca del producto
+            keyword: Palabra clave en nombre o descripción
+            use_fulltext: Usar el índice Lucene de GraphDB para keyword
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        filter_clause = ProductQueries._build_search_filters(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            marca=marca,
+            keyword=keyword,
+            use_fulltext=use_fulltext
+        )
+
+        return _COUNT_SEARCH_PRODUCTS_TMPL.format(filter_clause=filter_clause)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _build_search_filters(
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        marca: Optional[str] = None,
+        keyword: Optional[str] = None,
+        use_fulltext: bool = False
+    ) -> str:
+        """
+        Construye la cláusula de filtros compartida por búsqueda y conteo.
+
+        Args:
+            category: Categoría de producto
+            min_price: Precio mínimo
+            max_price: Precio máximo
+            marca: Marca del producto
+            keyword: Palabra clave en nombre o descripción
+            use_fulltext: Usar el índice Lucene de GraphDB para keyword
+
+        Returns:
+            str: Cláusula de filtros SPARQL
+        """
         filters = []
 
         # Filtro por categoría (con jerarquía)
         if category:
-            filters.append(f"?producto rdf:type/rdfs:subClassOf* sc:{category} .")
+            _validate_local_name(category)
+            filters.append(_member_of("?producto", category))
 
         # Filtro por precio mínimo
         if min_price is not None:
@@ -100,55 +474,49 @@ WHERE {{
         if max_price is not None:
             filters.append(f"FILTER(?precio <= {max_price})")
 
-        # Filtro por marca
+        # Filtro por marca (texto libre: se escapa y se trunca antes de
+        # interpolarlo como literal). FILTER EXISTS con variables propias
+        # en vez de repetir el patrón sc:tieneMarca como bloque requerido:
+        # la plantilla ya evalúa ese join en su OPTIONAL y duplicarlo
+        # obligaría al planner a resolverlo dos veces
         if marca:
+            escaped_marca = _escape_literal(marca[:_MAX_FILTER_TEXT])
             filters.append(f"""
-                ?producto sc:tieneMarca ?marcaUri .
-                ?marcaUri sc:tieneNombre "{marca}" .
+                FILTER EXISTS {{
+                    ?producto sc:tieneMarca ?m .
+                    ?m sc:tieneNombre "{escaped_marca}" .
+                }}
             """)
 
-        # Filtro por palabra clave
-        if keyword:
+        # Filtro por palabra clave: con índice full-text configurado se
+        # usa el conector Lucene (búsqueda indexada O(log N)); sin él,
+        # el escaneo lineal con CONTAINS sobre nombre y descripción
+        if keyword and use_fulltext:
+            escaped = _escape_literal(
+                _escape_lucene(keyword[:_MAX_FILTER_TEXT])
+            )
+            filters.append(f"""
+                ?busqueda <http://www.ontotext.com/owlim/lucene#query> "{escaped}" ;
+                          <http://www.ontotext.com/owlim/lucene#entities> ?producto .
+            """)
+        elif keyword:
+            escaped_kw = _escape_literal(keyword[:_MAX_FILTER_TEXT].lower())
             filters.append(f"""
                 {{
                     ?producto sc:tieneNombre ?nombre .
-                    FILTER(CONTAINS(LCASE(?nombre), "{keyword.lower()}"))
+                    FILTER(CONTAINS(LCASE(?nombre), "{escaped_kw}"))
                 }}
                 UNION
                 {{
                     ?producto sc:tieneDescripcion ?desc .
-                    FILTER(CONTAINS(LCASE(?desc), "{keyword.lower()}"))
+                    FILTER(CONTAINS(LCASE(?desc), "{escaped_kw}"))
                 }}
             """)
 
-        filter_clause = "\n    ".join(filters) if filters else ""
-
-        return f"""
-SELECT DISTINCT ?producto ?nombre ?precio ?stock ?marca ?vendedor ?categoria
-WHERE {{
-    ?producto rdf:type ?categoria .
-    ?producto rdf:type/rdfs:subClassOf* sc:Producto .
-    ?producto sc:tieneNombre ?nombre .
-    ?producto sc:tienePrecio ?precio .
-
-    {filter_clause}
-
-    OPTIONAL {{ ?producto sc:tieneStock ?stock }}
-    OPTIONAL {{
-        ?producto sc:tieneMarca ?marcaUri .
-        ?marcaUri sc:tieneNombre ?marca .
-    }}
-    OPTIONAL {{
-        ?producto sc:vendidoPor ?vendedorUri .
-        ?vendedorUri sc:tieneNombre ?vendedor .
-    }}
-}}
-ORDER BY ?precio
-LIMIT {limit}
-OFFSET {offset}
-"""
+        return "\n    ".join(filters) if filters else ""
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def get_similar_products(product_id: str, limit: int = 5) -> str:
         """
         Obtiene productos similares usando la propiedad esSimilarA.
@@ -160,6 +528,7 @@ OFFSET {offset}
         Returns:
             str: Consulta SPARQL
         """
+        _validate_local_name(product_id)
         return f"""
 SELECT DISTINCT ?similar ?nombre ?precio ?marca
 WHERE {{
@@ -187,6 +556,7 @@ LIMIT {limit}
 """
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def get_compatible_products(product_id: str) -> str:
         """
         Obtiene productos compatibles.
@@ -197,6 +567,7 @@ LIMIT {limit}
         Returns:
             str: Consulta SPARQL
         """
+        _validate_local_name(product_id)
         return """
 SELECT DISTINCT ?compatible ?nombre ?precio
 WHERE {
@@ -214,6 +585,85 @@ WHERE {
 """
 
     @staticmethod
+    def materialize_category_closure() -> str:
+        """
+        Materializa el cierre de categorías como predicado sc:enCategoria.
+
+        Pensado para ejecutarse una vez al arrancar (vía
+        SPARQLClient.update) cuando GRAPHDB_MATERIALIZED_CATEGORIES está
+        activo: la membresía deja de evaluar el property path con punto
+        fijo y pasa a ser una búsqueda directa de predicado.
+
+        Returns:
+            str: Consulta SPARQL UPDATE
+        """
+        return """
+INSERT { ?p sc:enCategoria ?c }
+WHERE {
+    ?p rdf:type/rdfs:subClassOf* ?c .
+    ?c rdfs:subClassOf* sc:Producto .
+}
+"""
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def get_related_products(product_id: str, limit: int = 10) -> str:
+        """
+        Obtiene productos similares y compatibles en una sola consulta.
+
+        Fusiona get_similar_products y get_compatible_products en un
+        único SELECT con UNION: cada rama etiqueta su relación vía BIND
+        y el servicio separa los resultados por ?relacion.
+
+        Args:
+            product_id: ID del producto
+            limit: Límite total de resultados
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        _validate_local_name(product_id)
+        return f"""
+SELECT DISTINCT ?producto ?relacion ?nombre ?precio ?marca
+WHERE {{
+    {{
+        sc:{product_id} sc:esSimilarA ?producto .
+        BIND("similar" AS ?relacion)
+    }}
+    UNION
+    {{
+        ?producto sc:esSimilarA sc:{product_id} .
+        BIND("similar" AS ?relacion)
+    }}
+    UNION
+    {{
+        sc:{product_id} sc:esEquivalenteTecnico ?producto .
+        BIND("equivalente" AS ?relacion)
+    }}
+    UNION
+    {{
+        sc:{product_id} sc:esCompatibleCon ?producto .
+        BIND("compatible" AS ?relacion)
+    }}
+    UNION
+    {{
+        ?producto sc:esCompatibleCon sc:{product_id} .
+        BIND("compatible" AS ?relacion)
+    }}
+
+    ?producto sc:tieneNombre ?nombre .
+    ?producto sc:tienePrecio ?precio .
+
+    OPTIONAL {{
+        ?producto sc:tieneMarca ?marcaUri .
+        ?marcaUri sc:tieneNombre ?marca .
+    }}
+}}
+LIMIT {limit}
+"""
+
+    @staticmethod
+    @lru_cache(maxsize=128)
     def get_incompatible_products(product_id: str) -> str:
         """
         Obtiene productos incompatibles.
@@ -224,6 +674,7 @@ WHERE {
         Returns:
             str: Consulta SPARQL
         """
+        _validate_local_name(product_id)
         return """
 SELECT DISTINCT ?incompatible ?nombre ?razon
 WHERE {
@@ -261,8 +712,10 @@ class ComparisonQueries:
         Returns:
             str: Consulta SPARQL
         """
-        # Crear VALUES clause con los productos
-        products_values = " ".join([f"sc:{pid}" for pid in product_ids])
+        # Crear VALUES clause con los productos (cada ID validado)
+        products_values = " ".join(
+            f"sc:{_validate_local_name(pid)}" for pid in product_ids
+        )
 
         return f"""
 SELECT ?producto ?nombre ?precio ?ram ?almacenamiento ?pulgadas ?procesador ?so
@@ -284,22 +737,26 @@ WHERE {{
 """
 
     @staticmethod
-    def find_best_value_in_category(category: str, limit: int = 10) -> str:
+    @lru_cache(maxsize=128)
+    def find_best_value_in_category(category: str) -> str:
         """
-        Encuentra productos con mejor relación calidad-precio en una categoría.
+        Obtiene los datos de calidad-precio de una categoría.
+
+        El score y la selección top-K se calculan en el servicio con
+        NumPy, así el triplestore no ordena la categoría completa.
 
         Args:
             category: Categoría de producto
-            limit: Límite de resultados
 
         Returns:
             str: Consulta SPARQL
         """
+        _validate_local_name(category)
+        member = _member_of("?producto", category)
         return f"""
 SELECT ?producto ?nombre ?precio ?ram ?almacenamiento
-    ((?ram + ?almacenamiento) / ?precio AS ?valorScore)
 WHERE {{
-    ?producto rdf:type/rdfs:subClassOf* sc:{category} .
+    {member}
     ?producto sc:tieneNombre ?nombre .
     ?producto sc:tienePrecio ?precio .
     ?producto sc:tieneRAM_GB ?ram .
@@ -307,8 +764,6 @@ WHERE {{
 
     FILTER(?precio > 0)
 }}
-ORDER BY DESC(?valorScore)
-LIMIT {limit}
 """
 
 
@@ -316,6 +771,7 @@ class RecommendationQueries:
     """Consultas SPARQL para recomendaciones."""
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def get_recommendations_for_user(user_id: str, limit: int = 10) -> str:
         """
         Obtiene recomendaciones para un usuario basadas en reglas SWRL.
@@ -327,6 +783,7 @@ class RecommendationQueries:
         Returns:
             str: Consulta SPARQL
         """
+        _validate_local_name(user_id)
         return f"""
 SELECT DISTINCT ?producto ?nombre ?precio ?razon
 WHERE {{
@@ -345,7 +802,7 @@ WHERE {{
     {{
         # Productos de categorías preferidas
         sc:{user_id} sc:prefiereCategoria ?categoria .
-        ?producto rdf:type/rdfs:subClassOf* ?categoria .
+        {_MEMBER_PREF}
         BIND("Categoría preferida" AS ?razon)
     }}
 
@@ -356,6 +813,66 @@ LIMIT {limit}
 """
 
     @staticmethod
+    @lru_cache(maxsize=128)
+    def get_personalized(
+        user_id: str,
+        category: Optional[str] = None,
+        max_price: Optional[float] = None,
+        limit: int = 10
+    ) -> str:
+        """
+        Obtiene recomendaciones con filtros aplicados en el triplestore.
+
+        Empujar categoría y precio máximo al WHERE evita traer filas que
+        luego se descartarían en Python.
+
+        Args:
+            user_id: ID del usuario
+            category: Categoría específica (opcional)
+            max_price: Precio máximo (opcional)
+            limit: Límite de resultados
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        _validate_local_name(user_id)
+        filters = []
+        if category:
+            _validate_local_name(category)
+            filters.append(_member_of("?producto", category))
+        if max_price is not None:
+            filters.append(f"FILTER(?precio <= {max_price})")
+        filter_clause = "\n    ".join(filters)
+
+        return f"""
+SELECT DISTINCT ?producto ?nombre ?precio ?razon
+WHERE {{
+    {{
+        ?producto sc:esRecomendadoPara sc:{user_id} .
+        BIND("Recomendado por perfil" AS ?razon)
+    }}
+    UNION
+    {{
+        ?producto sc:estaDentroPresupuesto sc:{user_id} .
+        BIND("Dentro de presupuesto" AS ?razon)
+    }}
+    UNION
+    {{
+        sc:{user_id} sc:prefiereCategoria ?categoria .
+        {_MEMBER_PREF}
+        BIND("Categoría preferida" AS ?razon)
+    }}
+
+    ?producto sc:tieneNombre ?nombre .
+    ?producto sc:tienePrecio ?precio .
+
+    {filter_clause}
+}}
+LIMIT {limit}
+"""
+
+    @staticmethod
+    @lru_cache(maxsize=128)
     def get_user_budget_products(user_id: str) -> str:
         """
         Obtiene productos dentro del presupuesto del usuario.
@@ -366,12 +883,13 @@ LIMIT {limit}
         Returns:
             str: Consulta SPARQL
         """
+        _validate_local_name(user_id)
         return f"""
 SELECT ?producto ?nombre ?precio
 WHERE {{
     sc:{user_id} sc:presupuestoMaximo ?presupuesto .
 
-    ?producto rdf:type/rdfs:subClassOf* sc:Producto .
+    {_MEMBER_PRODUCTO}
     ?producto sc:tieneNombre ?nombre .
     ?producto sc:tienePrecio ?precio .
 
@@ -405,6 +923,106 @@ WHERE {
 }
 GROUP BY ?categoria
 ORDER BY DESC(?totalProductos)
+"""
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def get_price_range_for_category(category: str) -> str:
+        """
+        Obtiene el rango de precios de una sola categoría.
+
+        Evita agregar el mercado completo cuando solo interesa una
+        categoría (por ejemplo una recién creada que aún no está en el
+        índice cacheado).
+
+        Args:
+            category: Categoría de producto
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        _validate_local_name(category)
+        member = _member_of("?producto", category)
+        return f"""
+SELECT
+    (MIN(?precio) AS ?precioMinimo)
+    (MAX(?precio) AS ?precioMaximo)
+    (AVG(?precio) AS ?precioPromedio)
+    (COUNT(?producto) AS ?totalProductos)
+WHERE {{
+    {member}
+    ?producto sc:tienePrecio ?precio .
+}}
+"""
+
+    @staticmethod
+    def get_combined_market_stats() -> str:
+        """
+        Obtiene las tres agrupaciones de estadísticas en una consulta.
+
+        Cada rama UNION es un subselect (categoría, vendedor, marca)
+        etiquetado con ?dimension vía BIND; el servicio separa las filas
+        por esa etiqueta. Una sola ida al triplestore y un solo parse
+        JSON en lugar de tres, y el patrón ?producto sc:tienePrecio
+        ?precio se comparte entre subconsultas.
+
+        Returns:
+            str: Consulta SPARQL
+        """
+        return """
+SELECT ?dimension ?categoria ?vendedor ?marca
+    ?totalProductos ?precioPromedio ?precioMinimo ?precioMaximo
+WHERE {
+    {
+        {
+            SELECT ?categoria
+                (MIN(?precio) AS ?precioMinimo)
+                (MAX(?precio) AS ?precioMaximo)
+                (AVG(?precio) AS ?precioPromedio)
+                (COUNT(?producto) AS ?totalProductos)
+            WHERE {
+                ?producto rdf:type ?categoria .
+                ?categoria rdfs:subClassOf* sc:Producto .
+                ?producto sc:tienePrecio ?precio .
+            }
+            GROUP BY ?categoria
+        }
+        BIND("categoria" AS ?dimension)
+    }
+    UNION
+    {
+        {
+            SELECT ?vendedor
+                (COUNT(?producto) AS ?totalProductos)
+                (AVG(?precio) AS ?precioPromedio)
+                (MIN(?precio) AS ?precioMinimo)
+                (MAX(?precio) AS ?precioMaximo)
+            WHERE {
+                ?producto sc:vendidoPor ?vendedorUri .
+                ?vendedorUri sc:tieneNombre ?vendedor .
+                ?producto sc:tienePrecio ?precio .
+            }
+            GROUP BY ?vendedor
+        }
+        BIND("vendedor" AS ?dimension)
+    }
+    UNION
+    {
+        {
+            SELECT ?marca
+                (COUNT(?producto) AS ?totalProductos)
+                (AVG(?precio) AS ?precioPromedio)
+            WHERE {
+                ?producto sc:tieneMarca ?marcaUri .
+                ?marcaUri sc:tieneNombre ?marca .
+                ?producto sc:tienePrecio ?precio .
+            }
+            GROUP BY ?marca
+            HAVING (COUNT(?producto) > 0)
+        }
+        BIND("marca" AS ?dimension)
+    }
+}
 """
 
     @staticmethod
@@ -3,17 +3,27 @@ Aplicación principal de FastAPI para SmartCompareMarket.
 Punto de entrada de la API REST.
 """
 from contextlib import asynccontextmanager
+import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.core.config import get_settings
+from app.core.dependencies import get_redis_cache, get_redis_client
 from app.core.exceptions import (
     SmartCompareMarketException,
     OntologyException,
     SPARQLException
 )
 from app.api import products, comparisons, recommendations, analysis
+from app.application.product_service import ProductService
+from app.application.comparison_service import ComparisonService
+from app.application.recommendation_service import RecommendationService
+from app.application.analysis_service import AnalysisService
+from app.infrastructure.sparql.client import SPARQLClient
+from app.infrastructure.sparql.queries import ProductQueries
+from app.infrastructure.ontology.loader import OntologyLoader
+from app.infrastructure.reasoner.engine import ReasonerEngine
 from app.domain.schemas import HealthCheckResponse, ErrorResponse
 
 # ============================================================================
@@ -36,6 +46,7 @@ async def lifespan(app: FastAPI):
     - Valida la conexión con GraphDB
     - Carga la ontología
     - Inicializa el reasoner
+    - Construye los servicios compartidos en app.state
 
     Shutdown:
     - Cierra conexiones
@@ -46,10 +57,107 @@ async def lifespan(app: FastAPI):
     print(f"Repositorio: {settings.GRAPH_DB_REPOSITORY}")
     print(f"Razonamiento: {'Habilitado' if settings.ENABLE_REASONING else 'Deshabilitado'}")
 
+    # Cliente HTTP compartido por todo el proceso: keep-alive y HTTP/2
+    # hacia GraphDB en lugar de un handshake TCP/TLS por consulta
+    auth = None
+    if settings.GRAPH_DB_USERNAME and settings.GRAPH_DB_PASSWORD:
+        auth = (settings.GRAPH_DB_USERNAME, settings.GRAPH_DB_PASSWORD)
+
+    # keepalive_expiry mantiene las conexiones tibias entre ráfagas de
+    # requests; retries reintenta solo fallos de conexión (nunca
+    # requests ya enviados), seguro para los SELECT idempotentes
+    http_client = httpx.AsyncClient(
+        auth=auth,
+        timeout=settings.SPARQL_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=settings.HTTP_CONNECT_RETRIES,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    )
+    app.state.http = http_client
+
+    # Cliente SPARQL compartido por todo el proceso
+    sparql_client = SPARQLClient(
+        endpoint_url=settings.GRAPH_DB_URL,
+        repository=settings.GRAPH_DB_REPOSITORY,
+        username=settings.GRAPH_DB_USERNAME,
+        password=settings.GRAPH_DB_PASSWORD,
+        timeout=settings.SPARQL_TIMEOUT,
+        http_client=http_client
+    )
+    app.state.sparql_client = sparql_client
+
+    # Materializar el cierre de categorías como sc:enCategoria: un
+    # INSERT único al arrancar reemplaza la evaluación del property path
+    # en cada consulta de membresía
+    if settings.GRAPHDB_MATERIALIZED_CATEGORIES:
+        try:
+            await sparql_client.update(
+                ProductQueries.materialize_category_closure()
+            )
+        except SPARQLException as e:
+            print(f"No se pudo materializar el cierre de categorías: {e.message}")
+
+    # Motor de razonamiento (opcional en todos los servicios)
+    reasoner = None
+    if settings.ENABLE_REASONING:
+        try:
+            loader = OntologyLoader(
+                ontology_path=settings.ONTOLOGY_FILE_PATH,
+                base_uri=settings.ONTOLOGY_BASE_URI
+            )
+            await loader.load()
+            reasoner = ReasonerEngine(
+                ontology=loader.get_ontology(),
+                reasoner_type=settings.REASONER_TYPE,
+                cache_ttl=settings.REASONING_CACHE_TTL,
+                source_path=settings.ONTOLOGY_FILE_PATH
+            )
+        except OntologyException as e:
+            print(f"No se pudo inicializar el razonamiento: {e.message}")
+
+    # Servicios de aplicación: son wrappers sin estado sobre el cliente
+    # SPARQL, por lo que una sola instancia por proceso es segura y evita
+    # construir el grafo de servicios en cada request
+    product_service = ProductService(
+        sparql_client,
+        reasoner,
+        use_fulltext=settings.GRAPHDB_FULLTEXT_ENABLED
+    )
+    app.state.product_service = product_service
+    app.state.comparison_service = ComparisonService(sparql_client, product_service)
+    # Caché Redis compartido (None si está deshabilitado en settings)
+    redis_cache = await get_redis_cache(
+        await get_redis_client(settings),
+        settings
+    )
+
+    app.state.recommendation_service = RecommendationService(
+        sparql_client,
+        reasoner,
+        cache=redis_cache
+    )
+    app.state.analysis_service = AnalysisService(sparql_client)
+
+    # Precalentar el caché de similares con la primera página de
+    # productos (los más consultados); si GraphDB aún no responde, el
+    # caché simplemente se llenará bajo demanda
+    try:
+        first_page = await product_service.get_all_products(limit=10)
+        await product_service.warm_similar_cache([p.id for p in first_page])
+    except Exception as e:
+        print(f"No se pudo precalentar el caché de similares: {e}")
+
     yield
 
     # Shutdown
     print("Cerrando SmartCompareMarket API...")
+    await http_client.aclose()
 
 
 # ============================================================================
@@ -105,7 +213,10 @@ app = FastAPI(
     version="1.0.0",
     lifespan=lifespan,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # orjson serializa payloads numéricos varias veces más rápido
+    # que el json de la librería estándar
+    default_response_class=ORJSONResponse
 )
 
 